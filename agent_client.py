@@ -0,0 +1,281 @@
+"""
+Agent Client
+Calls deployed sub-agents (job, course, project) from the orchestrator.
+Each agent endpoint gets one client that sends requests over the shared
+keep-alive connection pool, caps the number of requests in flight to that
+agent, and hedges slow requests: when an answer has not arrived after the
+agent's observed p95 latency, a backup request is sent and whichever answer
+arrives first is used. Hedges are only sent when the agent has a free slot,
+so they never queue behind regular traffic.
+
+Each agent also has a circuit breaker (see circuit_breaker). While it is
+open, or when a call fails, the last good answer to the same query is
+returned, marked "stale", instead of an error.
+
+Calls can be made blocking (call) or non-blocking (submit, which returns a
+concurrent.futures.Future).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Optional
+
+import circuit_breaker
+import http_client
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DEFAULT_MAX_CONCURRENCY = 8  # Requests in flight per agent, hedges included
+DEFAULT_TIMEOUT = 60
+QUEUE_TIMEOUT_SECONDS = 5.0  # Longest a call waits for a free slot before failing
+HEDGE_PERCENTILE = 0.95
+MIN_HEDGE_SAMPLES = 20  # No hedging until this many latencies have been observed
+MIN_HEDGE_DELAY_SECONDS = 1.0
+LATENCY_WINDOW = 200
+SLOW_CALL_FRACTION = 0.75  # Calls slower than this share of the timeout count against the circuit breaker
+LAST_GOOD_MAX_ENTRIES = 128  # Answers kept per agent as a last-known-good fallback
+MAX_WORKERS = 32
+
+_attempt_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="agent-attempt")
+_call_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="agent-call")
+
+
+class AgentCallError(Exception):
+    """Raised when an agent cannot be reached or keeps failing."""
+
+
+class LatencyWindow:
+    """Rolling window of successful response times."""
+
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Return the given latency percentile, or None with too few samples."""
+        with self._lock:
+            if len(self._samples) < MIN_HEDGE_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class AgentClient:
+    """
+    Pooled, hedged client for one agent endpoint.
+
+    Thread-safe; one instance is shared by every call to the endpoint.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT,
+        hedge: bool = True
+    ):
+        self.url = url
+        self._timeout = timeout
+        self._hedge = hedge
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._latency = LatencyWindow()
+        self._breaker = circuit_breaker.get_breaker(url, slow_call_seconds=timeout * SLOW_CALL_FRACTION)
+        self._last_good: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "failures": 0, "rejected": 0, "hedged": 0, "hedge_wins": 0, "stale_answers": 0}
+
+    def submit(self, query: str, timeout: Optional[float] = None) -> Future:
+        """Start a call without waiting for it; the future resolves to call()'s result."""
+        return _call_pool.submit(self.call, query, timeout)
+
+    def call(self, query: str, timeout: Optional[float] = None) -> Dict:
+        """
+        Send a query to the agent and return its JSON response.
+
+        Args:
+            query: The user query to send to the agent
+            timeout: Overall time allowed for the call, hedges included
+
+        Returns:
+            The agent's response dictionary. If the agent is unavailable, the
+            last good answer to the same query with "stale": True
+
+        Raises:
+            AgentCallError: If the agent is unavailable (circuit open, no slot
+                frees up in time, every attempt fails, or no answer arrives
+                before the timeout) and there is no earlier answer to fall back to
+        """
+        timeout = self._timeout if timeout is None else timeout
+        self._count("calls")
+
+        ticket = self._breaker.allow()
+        if ticket is None:
+            return self._last_known_good(query, AgentCallError(
+                f"Agent at {self.url} is failing; calls are paused for {self._breaker.retry_after():.0f}s"
+            ))
+        if not self._slots.acquire(timeout=min(QUEUE_TIMEOUT_SECONDS, timeout)):
+            # Local back-pressure, not a sign of an unhealthy agent
+            self._breaker.release(ticket)
+            self._count("rejected")
+            return self._last_known_good(query, AgentCallError(f"Agent at {self.url} is at its concurrency limit"))
+
+        started = time.monotonic()
+        try:
+            result = self._call_hedged(query, timeout, started)
+        except AgentCallError as e:
+            self._breaker.record(ticket, False, time.monotonic() - started)
+            return self._last_known_good(query, e)
+        except BaseException:
+            self._breaker.release(ticket)
+            raise
+        self._breaker.record(ticket, True, time.monotonic() - started)
+        with self._lock:
+            self._last_good[query] = result
+            self._last_good.move_to_end(query)
+            while len(self._last_good) > LAST_GOOD_MAX_ENTRIES:
+                self._last_good.popitem(last=False)
+        return result
+
+    def _call_hedged(self, query: str, timeout: float, started: float) -> Dict:
+        """Send the query, hedging once after the p95 latency; the caller holds one slot."""
+        deadline = started + timeout
+        payload = json.dumps({"inputText": query}).encode("utf-8")
+        attempts = {_attempt_pool.submit(self._attempt, payload, timeout): "primary"}
+        hedge_delay = self._latency.percentile(HEDGE_PERCENTILE) if self._hedge else None
+        if hedge_delay is not None:
+            hedge_delay = max(MIN_HEDGE_DELAY_SECONDS, hedge_delay)
+        hedged = False
+        error: Optional[Exception] = None
+
+        while attempts:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            hedge_due = hedge_delay is not None and not hedged
+            until = min(deadline, started + hedge_delay) if hedge_due else deadline
+            done, _ = wait(list(attempts), timeout=max(0.0, until - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                kind = attempts.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if kind == "hedge":
+                    self._count("hedge_wins")
+                return result
+
+            if hedge_due and attempts and time.monotonic() >= started + hedge_delay:
+                hedged = True
+                # A hedge must not wait for a slot, or it would add load exactly when the agent is slow
+                if self._slots.acquire(blocking=False):
+                    self._count("hedged")
+                    logger.info(f"No answer from {self.url} after {hedge_delay:.1f}s (p95), sending hedge request")
+                    attempts[_attempt_pool.submit(self._attempt, payload, deadline - time.monotonic())] = "hedge"
+
+        self._count("failures")
+        if error is None:
+            raise AgentCallError(f"Agent at {self.url} did not answer within {timeout:.0f}s")
+        raise AgentCallError(_describe(error)) from error
+
+    def stats(self) -> Dict:
+        """Return call counters, the current hedge delay and the circuit state."""
+        with self._lock:
+            stats = dict(self._stats)
+        p95 = self._latency.percentile(HEDGE_PERCENTILE)
+        stats["p95_seconds"] = round(p95, 2) if p95 is not None else None
+        stats["circuit"] = self._breaker.state
+        return stats
+
+    def _last_known_good(self, query: str, error: AgentCallError) -> Dict:
+        with self._lock:
+            result = self._last_good.get(query)
+            if result is None:
+                raise error
+            self._stats["stale_answers"] += 1
+        logger.warning(f"{error}; returning the last good answer for this query")
+        return dict(result, stale=True)
+
+    def _attempt(self, payload: bytes, timeout: float) -> Dict:
+        started = time.monotonic()
+        try:
+            # Bounded by the call's remaining time, so an abandoned attempt gives its slot back soon after
+            with http_client.request(
+                "POST", self.url,
+                headers={"Content-Type": "application/json"},
+                data=payload,
+                timeout=max(0.1, timeout)
+            ) as response:
+                result = json.loads(response.read().decode("utf-8"))
+            self._latency.add(time.monotonic() - started)
+            return result
+        finally:
+            self._slots.release()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, urllib.error.HTTPError):
+        return f"HTTP {error.code}: {error.reason}"
+    if isinstance(error, urllib.error.URLError):
+        return f"Network error: {error.reason}"
+    return f"Failed to call agent: {error}"
+
+
+def response_text(result: Dict) -> str:
+    """
+    Extract the answer text from an agent response.
+
+    Agents return {"response": ...}, where the value is either text or a
+    Strands message ({"role": ..., "content": [{"text": ...}]}).
+    """
+    response = result.get("response", "")
+    if isinstance(response, dict):
+        content = response.get("content", [])
+        if isinstance(content, list):
+            return "\n".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return str(response)
+
+
+_clients: Dict[str, AgentClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_agent_client(url: str) -> AgentClient:
+    """
+    Return the client for an agent endpoint, creating it on first use.
+
+    Limits come from AGENT_MAX_CONCURRENCY, AGENT_TIMEOUT_SECONDS and
+    AGENT_HEDGING ("false" to disable hedged requests).
+    """
+    with _clients_lock:
+        client = _clients.get(url)
+        if client is None:
+            client = _clients[url] = AgentClient(
+                url,
+                max_concurrency=int(os.getenv("AGENT_MAX_CONCURRENCY", str(DEFAULT_MAX_CONCURRENCY))),
+                timeout=float(os.getenv("AGENT_TIMEOUT_SECONDS", str(DEFAULT_TIMEOUT))),
+                hedge=os.getenv("AGENT_HEDGING", "true").strip().lower() != "false"
+            )
+        return client
+
+
+def agent_stats() -> Dict[str, Dict]:
+    """Return the stats of every agent client used so far."""
+    with _clients_lock:
+        clients = list(_clients.values())
+    return {client.url: client.stats() for client in clients}
@@ -0,0 +1,251 @@
+"""
+Course Catalog Service
+Local sidecar that owns one resident, indexed course catalog and answers
+department, class-level and keyword queries over localhost HTTP. The course
+agent and the orchestrator query it through CatalogServiceClient, so the
+catalog is downloaded and indexed once per host instead of once per process.
+
+Run with:
+    python catalog_service.py
+
+Endpoints:
+    GET /courses?dept=CS&level=Upper%20Division
+    GET /search?q=machine%20learning&limit=20
+    GET /recommend?goal=data%20scientist&limit=15
+    GET /stats
+    GET /ping
+"""
+
+import json
+import logging
+import os
+import urllib.error
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import circuit_breaker
+import http_client
+import rate_limiter
+from course_catalog import CatalogCache, CatalogRefresher, CatalogSource, Course
+from catalog_snapshot import SnapshotCatalog
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8090
+CLIENT_TIMEOUT = 5
+RETRY_SERVICE_AFTER_SECONDS = 30
+MAX_SEARCH_RESULTS = 100
+
+
+def create_local_catalog(
+    base_url: str,
+    api_key: str,
+    ttl: float,
+    refresh_interval: float = 0,
+    snapshot_path: str = "",
+    build_vectors: bool = False
+) -> Tuple[CatalogCache, CatalogRefresher]:
+    """
+    Set up an in-process catalog cache.
+
+    Args:
+        base_url: Nebula API base URL
+        api_key: Nebula API key
+        ttl: Cache lifetime in seconds
+        refresh_interval: Background refresh interval in seconds; 0 disables it
+        snapshot_path: Optional snapshot to prime the cache with
+        build_vectors: Build the course vector index (requires NumPy) whenever
+            a catalog is loaded or refreshed, instead of on the first recommendation
+
+    Returns:
+        Tuple of (cache, refresher)
+    """
+    source = CatalogSource(base_url, api_key)
+    on_load = None
+    if build_vectors:
+        from course_vectors import vector_index_for
+        on_load = vector_index_for
+    cache = CatalogCache(loader=source.load, ttl=ttl, on_load=on_load)
+    refresher = CatalogRefresher(cache, source, interval=refresh_interval)
+
+    # Serve from a prebuilt snapshot when available so cold starts don't wait on Nebula
+    if snapshot_path:
+        try:
+            snapshot = SnapshotCatalog(snapshot_path)
+            cache.prime(snapshot, age=snapshot.age)
+        except Exception as e:
+            logger.warning(f"Could not load catalog snapshot {snapshot_path}: {e}")
+
+    if refresh_interval > 0:
+        refresher.start()
+
+    return cache, refresher
+
+
+class CatalogServiceClient:
+    """
+    Catalog backed by the local catalog service.
+
+    Implements the query methods of CourseCatalog. If the service fails or
+    is slow, its circuit breaker opens on the first failure and queries are
+    answered from the fallback cache until a probe after
+    RETRY_SERVICE_AFTER_SECONDS succeeds.
+    """
+
+    def __init__(self, service_url: str, fallback: CatalogCache, timeout: float = CLIENT_TIMEOUT):
+        self._service_url = service_url.rstrip("/")
+        self._fallback = fallback
+        self._timeout = timeout
+        # The service is local, so a single failure means it is down
+        self._breaker = circuit_breaker.get_breaker(
+            "catalog_service", window=1, min_calls=1, open_seconds=RETRY_SERVICE_AFTER_SECONDS
+        )
+
+    def get(self) -> "CatalogServiceClient":
+        """Return the catalog to query (this client), mirroring CatalogCache.get()."""
+        return self
+
+    def courses_for(self, dept: str, level: str = "") -> List[Course]:
+        result = self._query("/courses", {"dept": dept, "level": level})
+        if result is None:
+            return self._fallback.get().courses_for(dept, level)
+        return [Course(**row) for row in result["results"]]
+
+    def search(self, query: str, limit: int = 20) -> List[Course]:
+        result = self._query("/search", {"q": query, "limit": limit})
+        if result is None:
+            return self._fallback.get().search(query, limit)
+        return [Course(**row) for row in result["results"]]
+
+    def recommend(self, goal: str, limit: int = 15) -> List[Tuple[Course, float]]:
+        result = self._query("/recommend", {"goal": goal, "limit": limit})
+        if result is None:
+            from course_vectors import recommend_courses
+            return recommend_courses(self._fallback.get(), goal, limit)
+        return [(Course(**row["course"]), row["relevance"]) for row in result["results"]]
+
+    def _query(self, path: str, params: Dict) -> Optional[Dict]:
+        url = f"{self._service_url}{path}?{urllib.parse.urlencode(params)}"
+
+        def fetch() -> Dict:
+            with http_client.request("GET", url, timeout=self._timeout) as response:
+                return json.loads(response.read().decode("utf-8"))
+
+        try:
+            return self._breaker.call(fetch)
+        except circuit_breaker.CircuitOpen:
+            return None
+        except urllib.error.HTTPError as e:
+            if e.code < 500:
+                raise
+            logger.warning(f"Catalog service error ({e.code}), using in-process catalog")
+        except (urllib.error.URLError, OSError) as e:
+            logger.warning(f"Catalog service unavailable ({e}), using in-process catalog")
+        return None
+
+
+class CatalogRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler answering catalog queries from the server's cache."""
+
+    server_version = "CatalogService/1.0"
+    # Keep connections open so pooled clients reuse them across queries
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        params = {key: values[0] for key, values in urllib.parse.parse_qs(url.query).items()}
+
+        try:
+            if url.path == "/ping":
+                self._send(200, {"status": "Healthy"})
+            elif url.path == "/stats":
+                catalog = self.server.catalog_cache.peek()
+                self._send(200, {
+                    "courses": len(catalog) if catalog is not None else 0,
+                    "loads": self.server.catalog_cache.stats(),
+                    "refresh": self.server.catalog_refresher.stats(),
+                    "upstreams": rate_limiter.ledger(),
+                    "circuits": circuit_breaker.breaker_stats()
+                })
+            elif url.path == "/courses":
+                if not params.get("dept"):
+                    self._send(400, {"error": "Missing required parameter: dept"})
+                    return
+                rows = self.server.catalog_cache.get().courses_for(params["dept"], params.get("level", ""))
+                self._send(200, {"count": len(rows), "results": [course.to_dict() for course in rows]})
+            elif url.path == "/search":
+                limit = min(int(params.get("limit", 20)), MAX_SEARCH_RESULTS)
+                rows = self.server.catalog_cache.get().search(params.get("q", ""), limit)
+                self._send(200, {"count": len(rows), "results": [course.to_dict() for course in rows]})
+            elif url.path == "/recommend":
+                from course_vectors import recommend_courses
+
+                limit = min(int(params.get("limit", 15)), MAX_SEARCH_RESULTS)
+                matches = recommend_courses(self.server.catalog_cache.get(), params.get("goal", ""), limit)
+                self._send(200, {
+                    "count": len(matches),
+                    "results": [{"course": course.to_dict(), "relevance": score} for course, score in matches]
+                })
+            else:
+                self._send(404, {"error": f"Unknown path: {url.path}"})
+        except ValueError as e:
+            self._send(400, {"error": f"Invalid parameter: {str(e)}"})
+        except Exception as e:
+            logger.error(f"Error handling {self.path}: {e}", exc_info=True)
+            self._send(503, {"error": f"Catalog unavailable: {str(e)}"})
+
+    def _send(self, status: int, body: Dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    api_key = os.getenv("NEBULA_API_KEY")
+    if not api_key:
+        raise ValueError("NEBULA_API_KEY environment variable is required")
+
+    cache, refresher = create_local_catalog(
+        base_url=os.getenv("NEBULA_BASE_URL", "https://api.utdnebula.com"),
+        api_key=api_key,
+        ttl=int(os.getenv("CATALOG_TTL_SECONDS", "3600")),
+        refresh_interval=int(os.getenv("CATALOG_REFRESH_SECONDS", "900")),
+        snapshot_path=os.getenv("CATALOG_SNAPSHOT_PATH", ""),
+        build_vectors=True
+    )
+
+    host = os.getenv("CATALOG_SERVICE_HOST", DEFAULT_HOST)
+    port = int(os.getenv("CATALOG_SERVICE_PORT", str(DEFAULT_PORT)))
+    server = ThreadingHTTPServer((host, port), CatalogRequestHandler)
+    server.catalog_cache = cache
+    server.catalog_refresher = refresher
+
+    # Load the catalog up front so the first query is served from memory
+    try:
+        cache.get()
+    except Exception as e:
+        logger.error(f"Initial catalog load failed, will retry on first query: {e}")
+
+    logger.info(f"Starting Course Catalog Service on {host}:{port}...")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""
+Course Catalog Snapshot
+Offline binary snapshot of the indexed course catalog. A snapshot holds the
+course records as fixed-size rows of string-table references (with each
+field's original type, so numbers read back as numbers) plus the
+prebuilt department, class-level and search indexes, so the course agent can
+mmap it at startup and serve queries without contacting Nebula or parsing
+JSON.
+
+Build a snapshot with:
+    python catalog_snapshot.py --output catalog.snap
+    python catalog_snapshot.py --input course_all.json --output catalog.snap
+"""
+
+import argparse
+import array
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Dict, List, Sequence
+
+from course_catalog import CATALOG_FIELDS, Course, CourseCatalog, fetch_catalog, iter_catalog_records
+
+logger = logging.getLogger(__name__)
+
+# File format
+MAGIC = b"CCSNAP01"
+FORMAT_VERSION = 2
+SECTIONS = (
+    "string_offsets",   # uint32[n_strings + 1] byte offsets into string_data
+    "string_data",      # utf-8 bytes
+    "courses",          # uint32[n_courses * len(CATALOG_FIELDS)] string ids
+    "field_types",      # uint8[n_courses * len(CATALOG_FIELDS)] indexes into VALUE_TYPES
+    "dept_keys",        # uint32[n_depts] string ids, sorted by string
+    "dept_offsets",     # uint32[n_depts + 1] offsets into dept_rows
+    "dept_rows",        # uint32 course ids
+    "level_keys",       # uint32[n_levels] string ids of "DEPT<TAB>level", sorted
+    "level_offsets",    # uint32[n_levels + 1] offsets into level_rows
+    "level_rows",       # uint32 course ids
+    "term_keys",        # uint32[n_terms] string ids, sorted by string
+    "term_offsets",     # uint32[n_terms + 1] offsets into postings
+    "posting_docs",     # uint32 course ids
+    "posting_tfs",      # uint32 term frequencies
+    "doc_norms",        # float64[n_courses] BM25 length normalization
+)
+HEADER = struct.Struct("<8sIId")
+SECTION_ENTRY = struct.Struct("<QQ")
+ALIGNMENT = 8
+LEVEL_KEY_SEPARATOR = "\t"
+SECTION_TYPECODES = {"string_data": None, "field_types": "B", "doc_norms": "d"}  # Others are uint32
+# Field values are stored as strings; these are the types they are converted back to
+VALUE_TYPES = (str, type(None), int, float, bool)
+_TYPE_CODES = {value_type: code for code, value_type in enumerate(VALUE_TYPES)}
+
+
+def _decode_value(type_code: int, text: str):
+    value_type = VALUE_TYPES[type_code]
+    if value_type is str:
+        return text
+    if value_type is type(None):
+        return None
+    if value_type is bool:
+        return text == "True"
+    return value_type(text)
+
+
+def write_snapshot(catalog: CourseCatalog, path: str) -> None:
+    """
+    Serialize an indexed catalog to a snapshot file.
+
+    The file is written to a temporary path and renamed into place, so a
+    running agent never maps a partially written snapshot.
+
+    Args:
+        catalog: Catalog to serialize
+        path: Destination file path
+    """
+    strings: Dict[str, int] = {}
+
+    def string_id(value) -> int:
+        value = "" if value is None else str(value)
+        if value not in strings:
+            strings[value] = len(strings)
+        return strings[value]
+
+    courses, field_types = array.array("I"), array.array("B")
+    for course in catalog.courses:
+        for field in CATALOG_FIELDS:
+            value = getattr(course, field)
+            courses.append(string_id(value))
+            # Values of other types (none expected) are read back as strings
+            field_types.append(_TYPE_CODES.get(type(value), 0))
+
+    doc_ids = {id(course): doc_id for doc_id, course in enumerate(catalog.courses)}
+
+    def grouped(index: Dict[str, List[Course]]):
+        keys, offsets, rows = array.array("I"), array.array("I", [0]), array.array("I")
+        for key in sorted(index):
+            keys.append(string_id(key))
+            rows.extend(doc_ids[id(course)] for course in index[key])
+            offsets.append(len(rows))
+        return keys, offsets, rows
+
+    dept_keys, dept_offsets, dept_rows = grouped(catalog._by_dept)
+    level_keys, level_offsets, level_rows = grouped({
+        f"{dept}{LEVEL_KEY_SEPARATOR}{level}": courses_at_level
+        for (dept, level), courses_at_level in catalog._by_dept_level.items()
+    })
+
+    term_keys, term_offsets = array.array("I"), array.array("I", [0])
+    posting_docs, posting_tfs = array.array("I"), array.array("I")
+    for term in catalog._vocabulary:
+        term_keys.append(string_id(term))
+        for doc_id, tf in catalog._postings[term]:
+            posting_docs.append(doc_id)
+            posting_tfs.append(tf)
+        term_offsets.append(len(posting_docs))
+
+    string_offsets = array.array("I", [0])
+    string_data = bytearray()
+    for value in strings:  # dicts preserve insertion order, i.e. string id order
+        string_data += value.encode("utf-8")
+        string_offsets.append(len(string_data))
+
+    sections = {
+        "string_offsets": string_offsets,
+        "string_data": bytes(string_data),
+        "courses": courses,
+        "field_types": field_types,
+        "dept_keys": dept_keys,
+        "dept_offsets": dept_offsets,
+        "dept_rows": dept_rows,
+        "level_keys": level_keys,
+        "level_offsets": level_offsets,
+        "level_rows": level_rows,
+        "term_keys": term_keys,
+        "term_offsets": term_offsets,
+        "posting_docs": posting_docs,
+        "posting_tfs": posting_tfs,
+        "doc_norms": array.array("d", catalog._doc_norms),
+    }
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(SECTIONS), time.time()))
+        table_offset = f.tell()
+        f.write(b"\0" * SECTION_ENTRY.size * len(SECTIONS))
+
+        entries = []
+        for name in SECTIONS:
+            data = sections[name]
+            if isinstance(data, array.array):
+                if sys.byteorder != "little":
+                    data = array.array(data.typecode, data)
+                    data.byteswap()
+                data = data.tobytes()
+            f.write(b"\0" * (-f.tell() % ALIGNMENT))
+            entries.append((f.tell(), len(data)))
+            f.write(data)
+
+        f.seek(table_offset)
+        for offset, length in entries:
+            f.write(SECTION_ENTRY.pack(offset, length))
+
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote catalog snapshot with {len(catalog.courses)} courses to {path}")
+
+
+class _StringTable(Sequence):
+    """Lazily decoded view over the snapshot string table."""
+
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        return str(self._data[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+
+class _KeyedView(Sequence):
+    """Sorted sequence of strings referenced by id, searchable with bisect."""
+
+    def __init__(self, strings: _StringTable, ids: memoryview):
+        self._strings = strings
+        self._ids = ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._strings[string_id] for string_id in self._ids[index]]
+        return self._strings[self._ids[index]]
+
+    def find(self, key: str) -> int:
+        """Return the position of `key`, or -1 if absent."""
+        lo, hi = 0, len(self._ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = self[mid]
+            if value < key:
+                lo = mid + 1
+            elif value > key:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+
+class _CourseRows(Sequence):
+    """Sequence of Course objects materialized on access from snapshot rows."""
+
+    def __init__(self, snapshot: "SnapshotCatalog", rows: Sequence[int]):
+        self._snapshot = snapshot
+        self._rows = rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._snapshot.course_at(row) for row in self._rows[index]]
+        return self._snapshot.course_at(self._rows[index])
+
+
+class _Postings:
+    """Mapping-like access to the snapshot inverted index."""
+
+    def __init__(self, terms: _KeyedView, offsets: memoryview, docs: memoryview, tfs: memoryview):
+        self._terms = terms
+        self._offsets = offsets
+        self._docs = docs
+        self._tfs = tfs
+
+    def __contains__(self, term):
+        return self._terms.find(term) >= 0
+
+    def __getitem__(self, term):
+        position = self._terms.find(term)
+        if position < 0:
+            raise KeyError(term)
+        start, end = self._offsets[position], self._offsets[position + 1]
+        return list(zip(self._docs[start:end], self._tfs[start:end]))
+
+
+class SnapshotCatalog(CourseCatalog):
+    """
+    Read-only CourseCatalog served from a memory-mapped snapshot.
+
+    Records and index entries are read straight from the mapping; Course
+    objects are only created for the rows a query returns.
+    """
+
+    mutable = False
+
+    def __init__(self, path: str):
+        if sys.byteorder != "little":
+            raise ValueError("Catalog snapshots can only be mapped on little-endian hosts")
+
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, section_count, built_at = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or section_count != len(SECTIONS):
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} catalog snapshot")
+        self.path = path
+        self.built_at = built_at
+
+        buffer = memoryview(self._mmap)
+        views = {}
+        for i, name in enumerate(SECTIONS):
+            offset, length = SECTION_ENTRY.unpack_from(self._mmap, HEADER.size + i * SECTION_ENTRY.size)
+            view = buffer[offset:offset + length]
+            typecode = SECTION_TYPECODES.get(name, "I")
+            views[name] = view if typecode is None else view.cast(typecode)
+
+        self._strings = _StringTable(views["string_offsets"], views["string_data"])
+        self._fields = views["courses"]
+        self._field_types = views["field_types"]
+        self._dept_keys = _KeyedView(self._strings, views["dept_keys"])
+        self._dept_offsets = views["dept_offsets"]
+        self._dept_rows = views["dept_rows"]
+        self._level_keys = _KeyedView(self._strings, views["level_keys"])
+        self._level_offsets = views["level_offsets"]
+        self._level_rows = views["level_rows"]
+
+        # Attributes used by CourseCatalog.search
+        self.courses = _CourseRows(self, range(len(self._fields) // len(CATALOG_FIELDS)))
+        self._vocabulary = _KeyedView(self._strings, views["term_keys"])
+        self._postings = _Postings(self._vocabulary, views["term_offsets"], views["posting_docs"], views["posting_tfs"])
+        self._doc_norms = views["doc_norms"]
+
+        logger.info(f"Mapped catalog snapshot {path} with {len(self.courses)} courses")
+
+    @property
+    def age(self) -> float:
+        """Seconds since the snapshot was built."""
+        return max(0.0, time.time() - self.built_at)
+
+    def course_at(self, row: int) -> Course:
+        """Materialize the Course stored at `row`."""
+        base = row * len(CATALOG_FIELDS)
+        end = base + len(CATALOG_FIELDS)
+        return Course(*(
+            _decode_value(type_code, self._strings[string_id])
+            for string_id, type_code in zip(self._fields[base:end], self._field_types[base:end])
+        ))
+
+    def courses_for(self, dept: str, level: str = "") -> Sequence[Course]:
+        dept = dept.upper()
+        if level:
+            keys, offsets, rows = self._level_keys, self._level_offsets, self._level_rows
+            key = f"{dept}{LEVEL_KEY_SEPARATOR}{level.lower()}"
+        else:
+            keys, offsets, rows = self._dept_keys, self._dept_offsets, self._dept_rows
+            key = dept
+
+        position = keys.find(key)
+        if position < 0:
+            return []
+        return _CourseRows(self, rows[offsets[position]:offsets[position + 1]])
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="Build an mmap-able course catalog snapshot")
+    parser.add_argument("--output", required=True, help="Snapshot file to write")
+    parser.add_argument("--input", help="Saved /course/all JSON response (default: download from Nebula)")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, "rb") as f:
+            records = list(iter_catalog_records(f))
+    else:
+        api_key = os.getenv("NEBULA_API_KEY")
+        if not api_key:
+            raise ValueError("NEBULA_API_KEY environment variable is required")
+        records = fetch_catalog(os.getenv("NEBULA_BASE_URL", "https://api.utdnebula.com"), api_key)
+
+    write_snapshot(CourseCatalog(records), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Circuit Breaker
+Per-upstream circuit breakers for SerpAPI, Nebula, the catalog service and
+peer agents. Each breaker watches the outcome of its last requests; a
+request counts as failed if it errors (connection errors, timeouts, 429/5xx)
+or takes longer than the upstream's slow-call threshold. When the failure
+rate crosses the threshold the circuit opens and requests fail immediately
+instead of tying up a worker thread for a full timeout. After a cool-down
+the circuit is half-open: a single probe request is let through, and only
+its outcome closes the circuit or opens it again with a doubled cool-down.
+Requests sent before the circuit opened may still finish after that; their
+outcomes are counted in the stats but do not move the circuit.
+
+Callers fall back to last-known-good data while a circuit is open: the job
+search cache serves expired results, the course catalog keeps serving the
+resident copy, and agent calls return the previous answer to the same query.
+"""
+
+import logging
+import os
+import threading
+import time
+import urllib.error
+from collections import deque
+from typing import Callable, Dict, Optional, TypeVar
+
+from rate_limiter import RETRYABLE_STATUS, UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Configuration
+DEFAULT_FAILURE_RATE = 0.5
+DEFAULT_MIN_CALLS = 5  # Outcomes needed before the failure rate is trusted
+DEFAULT_WINDOW = 20  # Most recent outcomes considered
+DEFAULT_OPEN_SECONDS = 30.0
+MAX_OPEN_SECONDS = 300.0
+DEFAULT_SLOW_CALL_SECONDS = 45.0
+
+# Per-upstream slow-call thresholds, overridable with <NAME>_SLOW_CALL_SECONDS
+SLOW_CALL_DEFAULTS = {
+    "serpapi": 8.0,
+    "nebula": 10.0,
+    "catalog_service": 2.0,
+}
+
+# Local refusals by the rate limiter say nothing about the upstream's health
+LOCAL_REJECTIONS = frozenset({"rate_limited", "quota_exhausted"})
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(UpstreamUnavailable):
+    """Raised instead of sending a request while the upstream's circuit is open."""
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(
+            upstream, "circuit_open",
+            f"{upstream} is failing or too slow; requests are paused for {retry_after:.0f}s",
+            retry_after=retry_after
+        )
+
+
+class CircuitBreaker:
+    """
+    Failure-rate and latency circuit breaker with half-open probing.
+
+    Thread-safe; one instance is shared by every request to an upstream.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        slow_call_seconds: float = DEFAULT_SLOW_CALL_SECONDS,
+        failure_rate: float = DEFAULT_FAILURE_RATE,
+        min_calls: int = DEFAULT_MIN_CALLS,
+        window: int = DEFAULT_WINDOW,
+        open_seconds: float = DEFAULT_OPEN_SECONDS
+    ):
+        self.name = name
+        self._slow_call_seconds = slow_call_seconds
+        self._failure_rate = failure_rate
+        self._min_calls = min_calls
+        self._base_open_seconds = open_seconds
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)  # True for a failed or slow call
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._open_seconds = open_seconds
+        self._tickets = 0
+        self._probe_ticket: Optional[int] = None
+        self._closed_after_ticket = 0  # Tickets up to this one predate the circuit's last close
+        self._stats = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> Optional[int]:
+        """
+        Ask to send a request.
+
+        Returns:
+            A ticket if the request may be sent; its outcome must then be
+            passed to record() or release() with that ticket. None while the
+            circuit is open or a half-open probe is already in flight.
+        """
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self._open_seconds:
+                    self._stats["rejected"] += 1
+                    return None
+                self._state = HALF_OPEN
+                logger.info(f"Circuit for {self.name} half-open, sending a probe request")
+            if self._state == HALF_OPEN and self._probe_ticket is not None:
+                self._stats["rejected"] += 1
+                return None
+            self._tickets += 1
+            if self._state == HALF_OPEN:
+                self._probe_ticket = self._tickets
+            self._stats["calls"] += 1
+            return self._tickets
+
+    def record(self, ticket: int, success: bool, elapsed: float):
+        """Record the outcome of the request allowed with `ticket`."""
+        slow = success and elapsed >= self._slow_call_seconds
+        failed = not success or slow
+        with self._lock:
+            self._stats["failures"] += not success
+            self._stats["slow_calls"] += slow
+
+            if ticket == self._probe_ticket:
+                self._probe_ticket = None
+                if failed:
+                    self._open(min(MAX_OPEN_SECONDS, self._open_seconds * 2))
+                else:
+                    self._state = CLOSED
+                    self._open_seconds = self._base_open_seconds
+                    self._outcomes.clear()
+                    self._closed_after_ticket = self._tickets
+                    logger.info(f"Circuit for {self.name} closed, probe succeeded in {elapsed:.2f}s")
+                return
+
+            # Late outcomes of requests sent before the circuit opened or last closed
+            if self._state != CLOSED or ticket <= self._closed_after_ticket:
+                return
+
+            self._outcomes.append(failed)
+            if len(self._outcomes) >= self._min_calls and sum(self._outcomes) / len(self._outcomes) >= self._failure_rate:
+                self._open(self._base_open_seconds)
+
+    def release(self, ticket: int):
+        """End the request allowed with `ticket` without judging the upstream's health."""
+        with self._lock:
+            if ticket == self._probe_ticket:
+                # Let the next request probe instead
+                self._probe_ticket = None
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self._open_seconds - time.monotonic())
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """
+        Run an upstream request through the breaker.
+
+        Raises:
+            CircuitOpen: If the circuit is open
+            Exception: Whatever `fn` raises, after recording the outcome
+        """
+        ticket = self.allow()
+        if ticket is None:
+            raise CircuitOpen(self.name, self.retry_after())
+
+        started = time.monotonic()
+        try:
+            result = fn()
+        except UpstreamUnavailable as e:
+            if e.reason in LOCAL_REJECTIONS:
+                self.release(ticket)
+            else:
+                self.record(ticket, False, time.monotonic() - started)
+            raise
+        except urllib.error.HTTPError as e:
+            # Other 4xx responses mean the upstream is up and answering
+            self.record(ticket, e.code not in RETRYABLE_STATUS, time.monotonic() - started)
+            raise
+        except Exception:
+            self.record(ticket, False, time.monotonic() - started)
+            raise
+        except BaseException:
+            # Interrupted, not answered: free a half-open probe slot for the next request
+            self.release(ticket)
+            raise
+        self.record(ticket, True, time.monotonic() - started)
+        return result
+
+    def stats(self) -> Dict:
+        """Return call counters and the current state."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["state"] = self._state
+            stats["recent_failure_rate"] = (
+                round(sum(self._outcomes) / len(self._outcomes), 2) if self._outcomes else 0.0
+            )
+        stats["retry_after_seconds"] = round(self.retry_after(), 1)
+        return stats
+
+    def _open(self, open_seconds: float):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._open_seconds = open_seconds
+        self._stats["opened"] += 1
+        logger.warning(
+            f"Circuit for {self.name} opened for {open_seconds:.0f}s "
+            f"({sum(self._outcomes)}/{len(self._outcomes)} recent calls failed or were slow)"
+        )
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(
+    name: str,
+    slow_call_seconds: Optional[float] = None,
+    failure_rate: Optional[float] = None,
+    min_calls: Optional[int] = None,
+    window: Optional[int] = None,
+    open_seconds: Optional[float] = None
+) -> CircuitBreaker:
+    """
+    Return the breaker for an upstream, creating it on first use.
+
+    Thresholds not passed explicitly come from CIRCUIT_FAILURE_RATE,
+    CIRCUIT_MIN_CALLS, CIRCUIT_WINDOW and CIRCUIT_OPEN_SECONDS; the slow-call
+    threshold from <NAME>_SLOW_CALL_SECONDS or SLOW_CALL_DEFAULTS. Pass
+    window=1 to open the circuit on a single failure.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            if slow_call_seconds is None:
+                default = SLOW_CALL_DEFAULTS.get(name, DEFAULT_SLOW_CALL_SECONDS)
+                slow_call_seconds = float(os.getenv(f"{name.upper()}_SLOW_CALL_SECONDS", str(default)))
+            breaker = _breakers[name] = CircuitBreaker(
+                name,
+                slow_call_seconds=slow_call_seconds,
+                failure_rate=failure_rate or float(os.getenv("CIRCUIT_FAILURE_RATE", str(DEFAULT_FAILURE_RATE))),
+                min_calls=min_calls or int(os.getenv("CIRCUIT_MIN_CALLS", str(DEFAULT_MIN_CALLS))),
+                window=window or int(os.getenv("CIRCUIT_WINDOW", str(DEFAULT_WINDOW))),
+                open_seconds=open_seconds or float(os.getenv("CIRCUIT_OPEN_SECONDS", str(DEFAULT_OPEN_SECONDS)))
+            )
+        return breaker
+
+
+def breaker_stats() -> Dict[str, Dict]:
+    """Return the stats of every breaker used so far."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
@@ -7,12 +7,17 @@ based on a user's career goals.
 from bedrock_agentcore import BedrockAgentCoreApp
 from strands import Agent, tool
 from strands.models import BedrockModel
-import json
-import urllib.request
 import urllib.error
 import logging
 import os
+from typing import List, Optional
 from dotenv import load_dotenv
+from catalog_service import CatalogServiceClient, create_local_catalog
+from course_vectors import recommend_courses
+from rate_limiter import UpstreamUnavailable
+from fast_path import FastPathRouter, render_courses, rows
+from query_router import QueryEntities
+from tool_compaction import compact_result
 
 # Load environment variables from .env file
 load_dotenv()
@@ -29,6 +34,10 @@ NEBULA_API_KEY = os.getenv("NEBULA_API_KEY")
 NEBULA_BASE_URL = os.getenv("NEBULA_BASE_URL", "https://api.utdnebula.com")
 MAX_DESC_LENGTH = 250
 AWS_REGION = os.getenv("AWS_DEFAULT_REGION", "us-east-1")
+CATALOG_TTL_SECONDS = int(os.getenv("CATALOG_TTL_SECONDS", "3600"))
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", "")
+CATALOG_REFRESH_SECONDS = int(os.getenv("CATALOG_REFRESH_SECONDS", "900"))
+CATALOG_SERVICE_URL = os.getenv("CATALOG_SERVICE_URL", "")
 
 # Validate required environment variables
 if not NEBULA_API_KEY:
@@ -37,6 +46,18 @@ if not NEBULA_API_KEY:
 # Initialize BedrockAgentCore app
 app = BedrockAgentCoreApp()
 
+# Process-wide catalog shared by all course tools. With a catalog service configured,
+# queries go to the service and the in-process cache is only loaded as a fallback.
+catalog_cache, catalog_refresher = create_local_catalog(
+    base_url=NEBULA_BASE_URL,
+    api_key=NEBULA_API_KEY,
+    ttl=CATALOG_TTL_SECONDS,
+    refresh_interval=0 if CATALOG_SERVICE_URL else CATALOG_REFRESH_SECONDS,
+    snapshot_path=CATALOG_SNAPSHOT_PATH,
+    build_vectors=True
+)
+catalog_backend = CatalogServiceClient(CATALOG_SERVICE_URL, catalog_cache) if CATALOG_SERVICE_URL else catalog_cache
+
 
 def truncate(text, length=MAX_DESC_LENGTH):
     """Truncate text to specified length with ellipsis"""
@@ -46,6 +67,13 @@ def truncate(text, length=MAX_DESC_LENGTH):
     return text if len(text) <= length else text[:length].rstrip() + "..."
 
 
+def format_course(course):
+    """Build the tool output dict for a catalog Course"""
+    result = course.to_dict()
+    result["description"] = truncate(course.description)
+    return result
+
+
 @tool
 def get_courses_by_department(
     course_dept: str,
@@ -68,18 +96,14 @@ def get_courses_by_department(
                 "error": "API key not configured. Please set NEBULA_API_KEY environment variable."
             }
 
-        # Fetch all courses from Nebula API
+        # Load the course catalog (cached across tool calls)
         logger.info(f"Fetching courses for department: {course_dept}, level: {course_level or 'all'}")
 
-        endpoint = f"{NEBULA_BASE_URL}/course/all"
-        headers = {"x-api-key": NEBULA_API_KEY}
-        req = urllib.request.Request(endpoint, headers=headers, method="GET")
-
         try:
-            with urllib.request.urlopen(req, timeout=15) as response:
-                data = response.read().decode("utf-8")
-                parsed = json.loads(data)
-                all_courses = parsed.get("data", [])
+            catalog = catalog_backend.get()
+        except UpstreamUnavailable as e:
+            logger.warning(f"Nebula unavailable: {e}")
+            return e.to_dict()
         except urllib.error.HTTPError as e:
             logger.error(f"HTTP Error fetching courses: {e.code} - {e.reason}")
             return {"error": f"Failed to fetch courses: HTTP {e.code}"}
@@ -90,50 +114,23 @@ def get_courses_by_department(
             logger.error(f"Unexpected error fetching courses: {e}")
             return {"error": f"Failed to fetch courses: {str(e)}"}
 
-        # Simplify and deduplicate courses
-        simplified = []
-        seen = set()
-        dept_code_upper = course_dept.upper()
-        course_level_lower = course_level.lower() if course_level else ""
-
-        for course in all_courses:
-            dept = course.get("subject_prefix", "").upper()
-            number = course.get("course_number", "")
-            key = (dept, number)
-
-            # Filter by department
-            if dept != dept_code_upper:
-                continue
-
-            # Filter by class level if specified
-            if course_level_lower and course.get("class_level", "").lower() != course_level_lower:
-                continue
-
-            # Deduplicate
-            if key not in seen:
-                simplified.append({
-                    "title": course.get("title", ""),
-                    "course_number": number,
-                    "description": truncate(course.get("description", "")),
-                    "credit_hours": course.get("credit_hours", ""),
-                    "class_level": course.get("class_level", ""),
-                    "school": course.get("school", ""),
-                    "subject_prefix": dept
-                })
-                seen.add(key)
+        # Indexed lookup; courses are already deduplicated by (dept, course_number)
+        matches = catalog.courses_for(course_dept, course_level)
 
         # Limit results to prevent overwhelming the LLM
         max_results = 50
+        # Output dicts are only built for the rows being returned
+        simplified = [format_course(course) for course in matches[:max_results]]
         result = {
-            "count": len(simplified),
-            "results": simplified[:max_results]
+            "count": len(matches),
+            "results": simplified
         }
 
-        if len(simplified) > max_results:
-            result["note"] = f"Showing first {max_results} of {len(simplified)} courses"
+        if len(matches) > max_results:
+            result["note"] = f"Showing first {max_results} of {len(matches)} courses"
 
-        logger.info(f"Found {len(simplified)} courses, returning {min(len(simplified), max_results)}")
-        return result
+        logger.info(f"Found {len(matches)} courses, returning {len(simplified)}")
+        return compact_result("get_courses_by_department", result)
 
     except Exception as e:
         logger.error(f"Error in get_courses_by_department: {e}", exc_info=True)
@@ -143,14 +140,14 @@ def get_courses_by_department(
 @tool
 def search_courses_by_keyword(keyword: str, max_results: int = 20) -> dict:
     """
-    Search for courses by keyword in title or description.
+    Search for courses by keywords in title or description, ranked by relevance.
 
     Args:
-        keyword: Search term to find in course titles or descriptions
+        keyword: Search terms to find in course titles or descriptions (multiple words allowed)
         max_results: Maximum number of results to return (default: 20)
 
     Returns:
-        Dictionary with count and list of matching courses
+        Dictionary with count and list of matching courses, most relevant first
     """
     try:
         if not NEBULA_API_KEY:
@@ -158,56 +155,143 @@ def search_courses_by_keyword(keyword: str, max_results: int = 20) -> dict:
 
         logger.info(f"Searching courses with keyword: {keyword}")
 
-        endpoint = f"{NEBULA_BASE_URL}/course/all"
-        headers = {"x-api-key": NEBULA_API_KEY}
-        req = urllib.request.Request(endpoint, headers=headers, method="GET")
+        catalog = catalog_backend.get()
 
-        with urllib.request.urlopen(req, timeout=15) as response:
-            data = response.read().decode("utf-8")
-            parsed = json.loads(data)
-            all_courses = parsed.get("data", [])
-
-        # Search in title and description
-        keyword_lower = keyword.lower()
-        matching = []
-        seen = set()
-
-        for course in all_courses:
-            dept = course.get("subject_prefix", "").upper()
-            number = course.get("course_number", "")
-            key = (dept, number)
-
-            title = course.get("title", "").lower()
-            desc = course.get("description", "").lower()
-
-            # Check if keyword matches
-            if keyword_lower in title or keyword_lower in desc:
-                if key not in seen:
-                    matching.append({
-                        "title": course.get("title", ""),
-                        "course_number": number,
-                        "description": truncate(course.get("description", "")),
-                        "credit_hours": course.get("credit_hours", ""),
-                        "class_level": course.get("class_level", ""),
-                        "school": course.get("school", ""),
-                        "subject_prefix": dept
-                    })
-                    seen.add(key)
-
-                    if len(matching) >= max_results:
-                        break
+        # Ranked search over the catalog's inverted index
+        matching = [format_course(course) for course in catalog.search(keyword, max_results)]
 
         logger.info(f"Found {len(matching)} courses matching '{keyword}'")
-        return {
+        return compact_result("search_courses_by_keyword", {
             "count": len(matching),
             "results": matching
-        }
+        })
 
+    except UpstreamUnavailable as e:
+        logger.warning(f"Nebula unavailable: {e}")
+        return e.to_dict()
     except Exception as e:
         logger.error(f"Error in search_courses_by_keyword: {e}", exc_info=True)
         return {"error": f"Failed to search courses: {str(e)}"}
 
 
+@tool
+def get_courses_batch(
+    departments: Optional[List[str]] = None,
+    levels: Optional[List[str]] = None,
+    keywords: Optional[List[str]] = None,
+    per_group_limit: int = 10
+) -> dict:
+    """
+    Look up several departments, class levels and keywords in one call.
+
+    Each department (combined with each requested level) and each keyword forms
+    a group. A course is only listed in the first group it appears in, so the
+    groups never repeat each other.
+
+    Args:
+        departments: Department codes (e.g., ['CS', 'MATH', 'STAT'])
+        levels: Optional class levels applied to every department (e.g., ['Upper Division'])
+        keywords: Search terms, each searched separately (e.g., ['machine learning', 'databases'])
+        per_group_limit: Maximum number of courses returned per group (default: 10)
+
+    Returns:
+        Dictionary with one entry per group, each with the number of courses listed and the courses
+    """
+    try:
+        departments = departments or []
+        levels = levels or [""]
+        keywords = keywords or []
+        if not departments and not keywords:
+            return {"error": "Provide at least one department or keyword"}
+
+        logger.info(f"Batch course lookup: departments={departments}, levels={levels}, keywords={keywords}")
+
+        try:
+            catalog = catalog_backend.get()
+        except UpstreamUnavailable as e:
+            logger.warning(f"Nebula unavailable: {e}")
+            return e.to_dict()
+        except Exception as e:
+            logger.error(f"Error fetching courses: {e}")
+            return {"error": f"Failed to fetch courses: {str(e)}"}
+
+        queries = []
+        for dept in dict.fromkeys(d.upper() for d in departments):
+            for level in dict.fromkeys(levels):
+                name = f"{dept} {level}".strip()
+                queries.append((name, catalog.courses_for(dept, level)))
+        for keyword in dict.fromkeys(keywords):
+            # Over-fetch so the group can still fill up after removing courses listed earlier
+            queries.append((f"keyword: {keyword}", catalog.search(keyword, per_group_limit * 3)))
+
+        groups = []
+        seen = set()
+        duplicates = 0
+        for name, matches in queries:
+            results = []
+            for course in matches:
+                if len(results) >= per_group_limit:
+                    break
+                if course.key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(course.key)
+                results.append(format_course(course))
+            groups.append({"group": name, "count": len(results), "results": results})
+
+        logger.info(f"Batch lookup returned {len(seen)} courses in {len(groups)} groups")
+        return compact_result("get_courses_batch", {
+            "group_count": len(groups),
+            "course_count": len(seen),
+            "duplicates_removed": duplicates,
+            "groups": groups
+        })
+
+    except Exception as e:
+        logger.error(f"Error in get_courses_batch: {e}", exc_info=True)
+        return {"error": f"Failed to process batch course lookup: {str(e)}"}
+
+
+@tool
+def recommend_courses_for_goal(career_goal: str, max_results: int = 15) -> dict:
+    """
+    Find the courses most relevant to a free-text career goal in a single call.
+
+    Matches the goal against every course title and description by vector
+    similarity, so no department codes or keywords need to be guessed.
+
+    Args:
+        career_goal: Career goal or target role (e.g., 'machine learning engineer working on NLP')
+        max_results: Maximum number of results to return (default: 15)
+
+    Returns:
+        Dictionary with count and list of courses, most relevant first
+    """
+    try:
+        logger.info(f"Recommending courses for goal: {career_goal}")
+
+        catalog = catalog_backend.get()
+
+        matching = []
+        for course, score in recommend_courses(catalog, career_goal, max_results):
+            result = format_course(course)
+            result["relevance"] = round(score, 3)
+            matching.append(result)
+
+        logger.info(f"Found {len(matching)} courses for goal '{career_goal}'")
+        return compact_result("recommend_courses_for_goal", {
+            "count": len(matching),
+            "results": matching
+        })
+
+    except UpstreamUnavailable as e:
+        logger.warning(f"Nebula unavailable: {e}")
+        return e.to_dict()
+    except Exception as e:
+        logger.error(f"Error in recommend_courses_for_goal: {e}", exc_info=True)
+        return {"error": f"Failed to recommend courses: {str(e)}"}
+
+
 # Configure the Strands agent with Amazon Nova Pro
 bedrock_model = BedrockModel(
     model_id="amazon.nova-pro-v1:0",
@@ -224,12 +308,11 @@ Your expertise lies in analyzing a user's ideal job or career goal to recommend
 
 When a user describes their career goal or ideal job:
 1. Identify the key technical skills and knowledge areas required for that career
-2. Determine which academic departments offer relevant courses (e.g., CS for software engineering, MATH for data science)
-3. Use the get_courses_by_department tool to find relevant courses
-4. Use the search_courses_by_keyword tool to find courses matching specific topics
-5. Recommend a structured learning path with specific courses
-6. Explain why each course is relevant to their career goal
-7. Suggest both foundational (Lower Division) and advanced (Upper Division) courses
+2. Start with the recommend_courses_for_goal tool, passing the career goal, to get the most relevant courses in one call
+3. Only if gaps remain, use get_courses_batch to look up all remaining departments (e.g., CS for software engineering, MATH for data science), levels and topic keywords in ONE call rather than calling get_courses_by_department or search_courses_by_keyword repeatedly
+4. Recommend a structured learning path with specific courses
+5. Explain why each course is relevant to their career goal
+6. Suggest both foundational (Lower Division) and advanced (Upper Division) courses
 
 Common department codes:
 - CS: Computer Science
@@ -244,7 +327,33 @@ Common department codes:
 - MECH: Mechanical Engineering
 
 Be specific, actionable, and explain the connection between courses and career goals. If a user asks about a specific career, analyze it thoughtfully and provide a comprehensive course recommendation.""",
-    tools=[get_courses_by_department, search_courses_by_keyword]
+    tools=[get_courses_by_department, search_courses_by_keyword, get_courses_batch, recommend_courses_for_goal]
+)
+
+
+def fast_department_courses(query: str, entities: QueryEntities) -> Optional[str]:
+    """Answer "<department> [<level>] courses" with a direct catalog lookup."""
+    if len(entities.departments) != 1 or len(entities.levels) > 1 or entities.titles or entities.locations:
+        return None
+    dept = entities.departments[0]
+    level = entities.levels[0] if entities.levels else ""
+    result = get_courses_by_department(dept, level)
+    if "error" in result:
+        return None
+    label = f"{level} {dept}" if level else dept
+    return render_courses(
+        f"{label} courses at UTD ({result['count']} total):",
+        rows(result, "results"),
+        result.get("count")
+    )
+
+
+fast_path = FastPathRouter("course_agent")
+fast_path.add(
+    "department_courses",
+    triggers=("course", "courses", "class", "classes"),
+    handler=fast_department_courses,
+    words=("offered", "available", "catalog", "utd", "department")
 )
 
 
@@ -263,6 +372,13 @@ def invoke_agentcore(payload):
 
         logger.info(f"Processing course recommendation request: {user_input}")
 
+        # Simple, unambiguous requests are answered without the model
+        fast_response = fast_path.route(user_input)
+        if fast_response is not None:
+            return {
+                "response": fast_response
+            }
+
         # Invoke the Strands agent
         result = agent(user_input)
 
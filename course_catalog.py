@@ -0,0 +1,755 @@
+"""
+Course Catalog
+Process-wide cache of the UTD Nebula course catalog shared by the course tools.
+The catalog is fetched at most once per TTL window; concurrent cold loads are
+coalesced into a single request and expired entries are served while a
+background refresh runs. Each load is indexed once by department and class
+level so lookups cost O(results) instead of O(catalog), and once into a BM25
+inverted index over course titles and descriptions for ranked keyword search.
+
+The /course/all response is parsed incrementally: records are decoded one at a
+time from the `data` array and only the fields the agents use are kept, so the
+raw payload is never held in memory as a whole. Each record is stored as a
+slotted Course with interned department, level and school strings; output
+dicts are built only for the rows a tool returns.
+
+A CatalogRefresher thread can keep the resident catalog current: it sends
+conditional requests, diffs the response against the resident catalog by
+(subject_prefix, course_number) and patches the indexes in place, so request
+threads never wait on a refresh.
+"""
+
+import bisect
+import codecs
+import heapq
+import json
+import logging
+import math
+import re
+import sys
+import threading
+import time
+import urllib.error
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+import http_client
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_TIMEOUT = 15
+REFRESH_RETRY_SECONDS = 60
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Course fields kept from each Nebula record; everything else is discarded while parsing
+CATALOG_FIELDS = (
+    "title",
+    "course_number",
+    "description",
+    "credit_hours",
+    "class_level",
+    "school",
+    "subject_prefix",
+)
+
+# Search configuration
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+TITLE_WEIGHT = 3  # Title tokens count this many times towards term frequency
+BM25_K1 = 1.2
+BM25_B = 0.75
+MIN_PREFIX_LENGTH = 3  # Shorter query terms only match whole tokens
+MAX_PREFIX_EXPANSIONS = 20
+PREFIX_MATCH_WEIGHT = 0.5
+
+
+class Course:
+    """Compact catalog record holding only CATALOG_FIELDS."""
+
+    __slots__ = CATALOG_FIELDS
+
+    def __init__(
+        self,
+        title: str = "",
+        course_number: str = "",
+        description: str = "",
+        credit_hours: str = "",
+        class_level: str = "",
+        school: str = "",
+        subject_prefix: str = ""
+    ):
+        self.title = title
+        self.course_number = course_number
+        self.description = description
+        self.credit_hours = credit_hours
+        self.class_level = class_level
+        self.school = school
+        self.subject_prefix = subject_prefix
+
+    @classmethod
+    def from_record(cls, record: Dict) -> "Course":
+        """Build a Course from a raw Nebula record, interning low-cardinality strings."""
+        return cls(
+            title=record.get("title") or "",
+            course_number=record.get("course_number") or "",
+            description=record.get("description") or "",
+            credit_hours=_intern(record.get("credit_hours") or ""),
+            class_level=_intern(record.get("class_level") or ""),
+            school=_intern(record.get("school") or ""),
+            subject_prefix=_intern((record.get("subject_prefix") or "").upper())
+        )
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        """Catalog identity of the course: (subject_prefix, course_number)."""
+        return (self.subject_prefix, self.course_number)
+
+    def to_dict(self) -> Dict:
+        """Materialize the course as a plain dict."""
+        return {field: getattr(self, field) for field in CATALOG_FIELDS}
+
+    def astuple(self) -> Tuple:
+        """Field values in CATALOG_FIELDS order, used to detect changed rows."""
+        return tuple(getattr(self, field) for field in CATALOG_FIELDS)
+
+    def __repr__(self):
+        return f"Course({self.subject_prefix} {self.course_number}: {self.title!r})"
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lower-case alphanumeric tokens."""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class _JsonStreamReader:
+    """Minimal pull reader over a byte stream of JSON text."""
+
+    _WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+    def __init__(self, stream: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            text = self._decoder.decode(b"", final=True)
+        else:
+            text = self._decoder.decode(chunk)
+        # Drop consumed text so the buffer only ever holds the current record
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            self._pos = self._WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of catalog response")
+
+    def expect(self, chars: str) -> str:
+        """Consume the next non-whitespace character, which must be one of `chars`."""
+        char = self.peek()
+        if char not in chars:
+            raise ValueError(f"Malformed catalog response: expected {chars!r}, got {char!r}")
+        self._pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self._buf) and not self._eof:
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+
+def iter_catalog_records(stream: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Course]:
+    """
+    Incrementally parse a /course/all response body.
+
+    Walks the top-level object, decoding the `data` array one record at a time
+    and projecting each record down to a Course. Other top-level members
+    are decoded and discarded.
+
+    Args:
+        stream: Binary file-like object positioned at the start of the body
+        chunk_size: Number of bytes to read per chunk
+
+    Yields:
+        Course records
+    """
+    reader = _JsonStreamReader(stream, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "data" and reader.peek() == "[":
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.expect("]")
+            else:
+                while True:
+                    record = reader.value()
+                    if isinstance(record, dict):
+                        yield Course.from_record(record)
+                    if reader.expect(",]") == "]":
+                        break
+        else:
+            reader.value()
+
+        if reader.expect(",}") == "}":
+            return
+
+
+class CatalogSource:
+    """
+    Nebula /course/all endpoint with support for conditional requests.
+
+    The ETag and Last-Modified validators of the last successful response are
+    remembered so that refreshes can be answered with 304 Not Modified.
+    """
+
+    def __init__(self, base_url: str, api_key: str, timeout: int = DEFAULT_TIMEOUT):
+        self.endpoint = f"{base_url}/course/all"
+        self._api_key = api_key
+        self._timeout = timeout
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+
+    def fetch(self, conditional: bool = False) -> Optional[List[Course]]:
+        """
+        Download the course catalog.
+
+        Args:
+            conditional: Send the remembered validators so an unchanged
+                catalog is not downloaded again
+
+        Returns:
+            List of Course records, or None if the catalog is unchanged
+        """
+        headers = {"x-api-key": self._api_key}
+        if conditional and self.etag:
+            headers["If-None-Match"] = self.etag
+        if conditional and self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        started = time.monotonic()
+        try:
+            with http_client.request(
+                "GET", self.endpoint, headers=headers, timeout=self._timeout, upstream="nebula"
+            ) as response:
+                courses = list(iter_catalog_records(response))
+                self.etag = response.headers.get("ETag")
+                self.last_modified = response.headers.get("Last-Modified")
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                logger.info("Course catalog not modified")
+                return None
+            raise
+
+        logger.info(f"Loaded {len(courses)} catalog records in {time.monotonic() - started:.2f}s")
+        return courses
+
+    def load(self) -> "CourseCatalog":
+        """Fetch the full catalog and build its indexes."""
+        return CourseCatalog(self.fetch())
+
+
+def fetch_catalog(base_url: str, api_key: str, timeout: int = DEFAULT_TIMEOUT) -> List[Course]:
+    """
+    Download the full course catalog from the Nebula API.
+
+    Args:
+        base_url: Nebula API base URL
+        api_key: Nebula API key
+        timeout: Request timeout in seconds
+
+    Returns:
+        List of Course records
+    """
+    return CatalogSource(base_url, api_key, timeout).fetch()
+
+
+class CourseCatalog:
+    """
+    Deduplicated course catalog indexed by department and class level.
+
+    Records are deduplicated by (subject_prefix, course_number) at build time,
+    keeping the first occurrence, so lookups never need a per-call seen set.
+    Titles and descriptions are tokenized into an inverted index used by
+    search().
+
+    apply_changes() patches the indexes in place for added and modified rows.
+    Each index entry is replaced rather than mutated, so concurrent readers
+    always see a consistent list for any single bucket or term.
+    """
+
+    # Whether apply_changes() is supported
+    mutable = True
+    # Incremented by every in-place update, so derived indexes can detect changes
+    version = 0
+
+    def __init__(self, records: List[Course]):
+        self.courses: List[Course] = []
+        self._by_dept: Dict[str, List[Course]] = {}
+        self._by_dept_level: Dict[Tuple[str, str], List[Course]] = {}
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._doc_lengths: List[int] = []
+        self._doc_ids: Dict[Tuple[str, str], int] = {}
+
+        for course in records:
+            if course.key in self._doc_ids:
+                continue
+            doc_id = len(self.courses)
+            self._doc_ids[course.key] = doc_id
+            self.courses.append(course)
+            self._by_dept.setdefault(course.subject_prefix, []).append(course)
+            self._by_dept_level.setdefault(_level_key(course), []).append(course)
+
+            term_counts = _term_counts(course)
+            for term, tf in term_counts.items():
+                self._postings.setdefault(term, []).append((doc_id, tf))
+            self._doc_lengths.append(sum(term_counts.values()))
+
+        self._vocabulary = sorted(self._postings)
+        self._doc_norms = _doc_norms(self._doc_lengths)
+
+        logger.info(
+            f"Indexed {len(self.courses)} courses across {len(self._by_dept)} departments "
+            f"({len(self._vocabulary)} search terms)"
+        )
+
+    def __len__(self):
+        return len(self.courses)
+
+    def courses_for(self, dept: str, level: str = "") -> List[Course]:
+        """
+        Look up the courses of a department, optionally restricted to a class level.
+
+        Args:
+            dept: Department code (case-insensitive)
+            level: Optional class level (case-insensitive)
+
+        Returns:
+            Courses in catalog order; the returned list must not be mutated
+        """
+        dept = dept.upper()
+        if level:
+            return self._by_dept_level.get((dept, level.lower()), [])
+        return self._by_dept.get(dept, [])
+
+    def search(self, query: str, limit: int = 20) -> List[Course]:
+        """
+        Rank courses against a free-text query with BM25.
+
+        Every query term contributes independently, so multi-word queries
+        favour courses matching more of the terms. Terms of at least
+        MIN_PREFIX_LENGTH characters also match longer tokens they prefix
+        (e.g. "algorithm" matches "algorithms") at a reduced weight.
+
+        Args:
+            query: Free-text search query
+            limit: Maximum number of courses to return
+
+        Returns:
+            Up to `limit` courses, most relevant first
+        """
+        if limit <= 0 or not self.courses:
+            return []
+
+        scores: Dict[int, float] = {}
+        for term in dict.fromkeys(tokenize(query)):
+            term_scores: Dict[int, float] = {}
+            for index_term, weight in self._expand(term):
+                postings = self._postings[index_term]
+                idf = math.log(1 + (len(self.courses) - len(postings) + 0.5) / (len(postings) + 0.5))
+                boost = weight * idf * (BM25_K1 + 1)
+                doc_norms = self._doc_norms
+                for doc_id, tf in postings:
+                    score = boost * tf / (tf + doc_norms[doc_id])
+                    if score > term_scores.get(doc_id, 0.0):
+                        term_scores[doc_id] = score
+            for doc_id, score in term_scores.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [self.courses[doc_id] for doc_id, _ in top]
+
+    def diff(self, records: List[Course]) -> Tuple[List[Course], List[Course], List[Tuple[str, str]]]:
+        """
+        Compare freshly fetched records against the resident catalog.
+
+        Args:
+            records: Records from a new catalog download
+
+        Returns:
+            Tuple of (added courses, modified courses, keys of removed courses)
+        """
+        added, changed, incoming = [], [], set()
+        for course in records:
+            if course.key in incoming:
+                continue
+            incoming.add(course.key)
+            doc_id = self._doc_ids.get(course.key)
+            if doc_id is None:
+                added.append(course)
+            elif self.courses[doc_id].astuple() != course.astuple():
+                changed.append(course)
+        removed = [key for key in self._doc_ids if key not in incoming]
+        return added, changed, removed
+
+    def apply_changes(self, added: List[Course], changed: List[Course]):
+        """
+        Patch the catalog and its indexes in place.
+
+        Modified rows keep their position; added rows are appended. Removing
+        rows is not supported in place because search results are addressed
+        by position, so callers rebuild the catalog when rows disappear.
+
+        Args:
+            added: Courses not yet in the catalog
+            changed: New versions of courses already in the catalog
+        """
+        if not added and not changed:
+            return
+
+        old_rows = {}
+        for course in changed:
+            doc_id = self._doc_ids[course.key]
+            old_rows[doc_id] = self.courses[doc_id]
+            self.courses[doc_id] = course
+        for course in added:
+            self._doc_ids[course.key] = len(self.courses)
+            self.courses.append(course)
+            self._doc_lengths.append(0)
+
+        # Search index: lengths and norms first, so every doc id in a posting list is scorable
+        removed_postings: Dict[str, set] = {}
+        added_postings: Dict[str, List[Tuple[int, int]]] = {}
+        for doc_id, old in old_rows.items():
+            for term in _term_counts(old):
+                removed_postings.setdefault(term, set()).add(doc_id)
+        for course in changed + added:
+            doc_id = self._doc_ids[course.key]
+            term_counts = _term_counts(course)
+            for term, tf in term_counts.items():
+                added_postings.setdefault(term, []).append((doc_id, tf))
+            self._doc_lengths[doc_id] = sum(term_counts.values())
+        self._doc_norms = _doc_norms(self._doc_lengths)
+
+        new_terms = False
+        for term in removed_postings.keys() | added_postings.keys():
+            stale = removed_postings.get(term, ())
+            postings = [entry for entry in self._postings.get(term, []) if entry[0] not in stale]
+            postings.extend(added_postings.get(term, []))
+            postings.sort()
+            new_terms = new_terms or term not in self._postings
+            self._postings[term] = postings
+        if new_terms:
+            self._vocabulary = sorted(self._postings)
+
+        # Department and class-level buckets, rebuilt only where rows moved in or changed
+        affected_depts, affected_levels = set(), set()
+        for course in list(old_rows.values()) + changed + added:
+            affected_depts.add(course.subject_prefix)
+            affected_levels.add(_level_key(course))
+        for dept in affected_depts:
+            self._by_dept[dept] = self._bucket(lambda c: c.subject_prefix == dept, self._by_dept.get(dept, []), changed + added)
+        for level_key in affected_levels:
+            self._by_dept_level[level_key] = self._bucket(
+                lambda c: _level_key(c) == level_key, self._by_dept_level.get(level_key, []), changed + added
+            )
+
+        # Only now, so anything keyed on the version (e.g. course vectors) sees the finished patch
+        self.version += 1
+
+    def _bucket(self, belongs, current: List[Course], updates: List[Course]) -> List[Course]:
+        """Rebuild one index bucket from its current rows plus updated rows, in catalog order."""
+        doc_ids = {self._doc_ids[course.key] for course in current}
+        doc_ids.update(self._doc_ids[course.key] for course in updates)
+        return [self.courses[doc_id] for doc_id in sorted(doc_ids) if belongs(self.courses[doc_id])]
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """Map a query term to the index terms it matches, with their weights."""
+        matches = []
+        if term in self._postings:
+            matches.append((term, 1.0))
+        if len(term) >= MIN_PREFIX_LENGTH:
+            start = bisect.bisect_right(self._vocabulary, term)
+            for candidate in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+                if not candidate.startswith(term):
+                    break
+                matches.append((candidate, PREFIX_MATCH_WEIGHT))
+        return matches
+
+
+def _level_key(course: Course) -> Tuple[str, str]:
+    return (course.subject_prefix, course.class_level.lower())
+
+
+def _term_counts(course: Course) -> Dict[str, int]:
+    term_counts: Dict[str, int] = {}
+    for token in tokenize(course.title):
+        term_counts[token] = term_counts.get(token, 0) + TITLE_WEIGHT
+    for token in tokenize(course.description):
+        term_counts[token] = term_counts.get(token, 0) + 1
+    return term_counts
+
+
+def _doc_norms(doc_lengths: List[int]) -> List[float]:
+    # Per-document BM25 length normalization, precomputed so scoring is a single pass over postings
+    avg_doc_length = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0
+    return [
+        BM25_K1 * (1 - BM25_B + BM25_B * length / avg_doc_length) if avg_doc_length else BM25_K1
+        for length in doc_lengths
+    ]
+
+
+class CatalogCache:
+    """
+    TTL-bounded cache around a catalog loader.
+
+    A cold cache blocks callers until the first load completes, with
+    concurrent callers coalesced onto a single load. Once populated, an
+    expired value is returned immediately while a single background thread
+    refreshes it. `on_load` is called with every catalog stored in the cache
+    (loaded, refreshed or primed), outside the cache lock, so derived indexes
+    can be built before queries need them.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], CourseCatalog],
+        ttl: float = DEFAULT_TTL_SECONDS,
+        wait_timeout: Optional[float] = None,
+        on_load: Optional[Callable[[CourseCatalog], None]] = None
+    ):
+        self._loader = loader
+        self._ttl = ttl
+        self._wait_timeout = wait_timeout
+        self._on_load = on_load
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._value = None
+        self._loaded_at = 0.0
+        self._refreshing = False
+
+    def get(self):
+        """
+        Return the cached catalog, loading or refreshing it as needed.
+
+        Raises:
+            TimeoutError: If a cold load started by another caller took longer
+                than `wait_timeout`
+        """
+        with self._lock:
+            if self._value is not None:
+                if time.monotonic() - self._loaded_at >= self._ttl and not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh, name="catalog-refresh", daemon=True).start()
+                return self._value
+
+        value = self._flight.do("catalog", self._loader, timeout=self._wait_timeout)
+        with self._lock:
+            stored = self._value is not value
+            if stored:
+                self._store(value)
+        if stored:
+            self._loaded(value)
+        return value
+
+    def prime(self, value, age: float = 0.0):
+        """
+        Seed the cache with an already loaded catalog.
+
+        Args:
+            value: Catalog to serve
+            age: How old the catalog already is, in seconds; a value older than
+                the TTL is served immediately and refreshed in the background
+        """
+        with self._lock:
+            self._value = value
+            self._loaded_at = time.monotonic() - age
+        self._loaded(value)
+
+    def peek(self):
+        """Return the cached catalog, or None, without loading or refreshing it."""
+        return self._value
+
+    def invalidate(self):
+        """Drop the cached catalog so the next call reloads it."""
+        with self._lock:
+            self._value = None
+            self._loaded_at = 0.0
+
+    def stats(self) -> Dict:
+        """Return load coalescing counters."""
+        return self._flight.stats()
+
+    def _refresh(self):
+        try:
+            value = self._flight.do("catalog", self._loader)
+        except Exception as e:
+            logger.warning(f"Catalog refresh failed, serving stale data: {e}")
+            with self._lock:
+                # Back off before the next refresh attempt instead of retrying on every call
+                self._loaded_at = time.monotonic() - self._ttl + min(self._ttl, REFRESH_RETRY_SECONDS)
+                self._refreshing = False
+            return
+
+        with self._lock:
+            self._store(value)
+            self._refreshing = False
+        self._loaded(value)
+
+    def _store(self, value):
+        self._value = value
+        self._loaded_at = time.monotonic()
+
+    def _loaded(self, value):
+        if self._on_load is None:
+            return
+        try:
+            self._on_load(value)
+        except Exception as e:
+            logger.warning(f"Catalog load hook failed: {e}", exc_info=True)
+
+
+class CatalogRefresher:
+    """
+    Background thread that keeps a CatalogCache current.
+
+    Every `interval` seconds it sends a conditional request for the catalog.
+    A 304 only renews the cache entry; a changed catalog is diffed against the
+    resident one and applied in place, falling back to a full rebuild when
+    rows were removed or the resident catalog is read-only (e.g. a snapshot).
+    """
+
+    def __init__(self, cache: CatalogCache, source: CatalogSource, interval: float):
+        self._cache = cache
+        self._source = source
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "refreshes": 0,
+            "failures": 0,
+            "not_modified": 0,
+            "full_rebuilds": 0,
+            "rows_added": 0,
+            "rows_changed": 0,
+            "rows_removed": 0,
+            "last_duration_seconds": 0.0,
+            "total_duration_seconds": 0.0,
+        }
+
+    def start(self):
+        """Start the refresher thread if it is not already running."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="catalog-refresher", daemon=True)
+            self._thread.start()
+            logger.info(f"Catalog refresher started (interval: {self._interval}s)")
+
+    def stop(self):
+        """Ask the refresher thread to exit after its current refresh."""
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        """Return a copy of the refresh counters."""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            self.refresh()
+
+    def refresh(self) -> bool:
+        """
+        Run a single refresh cycle.
+
+        Returns:
+            True if the refresh succeeded (including "not modified")
+        """
+        started = time.monotonic()
+        added = changed = removed = 0
+        not_modified = rebuilt = False
+        try:
+            current = self._cache.peek()
+            records = self._source.fetch(conditional=current is not None)
+
+            if records is None:
+                not_modified = True
+                catalog = current
+            elif current is None or not current.mutable:
+                rebuilt = True
+                catalog = CourseCatalog(records)
+                added = len(catalog)
+            else:
+                new_rows, changed_rows, removed_keys = current.diff(records)
+                added, changed, removed = len(new_rows), len(changed_rows), len(removed_keys)
+                if removed_keys:
+                    rebuilt = True
+                    catalog = CourseCatalog(records)
+                else:
+                    current.apply_changes(new_rows, changed_rows)
+                    catalog = current
+
+            self._cache.prime(catalog)
+        except Exception as e:
+            logger.warning(f"Background catalog refresh failed: {e}")
+            with self._stats_lock:
+                self._stats["failures"] += 1
+            return False
+        finally:
+            duration = time.monotonic() - started
+            with self._stats_lock:
+                self._stats["last_duration_seconds"] = duration
+                self._stats["total_duration_seconds"] += duration
+
+        with self._stats_lock:
+            self._stats["refreshes"] += 1
+            self._stats["not_modified"] += int(not_modified)
+            self._stats["full_rebuilds"] += int(rebuilt)
+            self._stats["rows_added"] += added
+            self._stats["rows_changed"] += changed
+            self._stats["rows_removed"] += removed
+
+        logger.info(
+            f"Catalog refresh completed in {duration:.2f}s: "
+            f"{'not modified' if not_modified else f'{added} added, {changed} changed, {removed} removed'}"
+            f"{' (full rebuild)' if rebuilt else ''}"
+        )
+        return True
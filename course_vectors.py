@@ -0,0 +1,149 @@
+"""
+Course Vectors
+Offline semantic matching of free-text career goals against the course
+catalog. Every course is embedded as a hashed TF-IDF vector (unigrams and
+bigrams of its title and description) over 2**20 dimensions, so distinct
+terms rarely collide. The vectors are sparse and stored grouped by
+dimension, so a goal is scored by visiting only the courses that share one
+of its terms. Catalog caches created with build_vectors=True (see
+catalog_service.create_local_catalog) build the index whenever a catalog is
+loaded or refreshed, so queries find it ready.
+"""
+
+import logging
+import threading
+import zlib
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from course_catalog import Course, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+VECTOR_DIMENSIONS = 2 ** 20
+TITLE_WEIGHT = 3
+STOP_WORDS = frozenset(
+    "a an and are as at be become becoming career course courses for from get good how i in into is it "
+    "job like me my need of on or should take the this to want what which with work would you".split()
+)
+
+
+def _features(text: str) -> List[int]:
+    """Hash the unigrams and bigrams of a text into vector dimensions."""
+    tokens = [token for token in tokenize(text) if token not in STOP_WORDS]
+    grams = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+    return [zlib.crc32(gram.encode("utf-8")) % VECTOR_DIMENSIONS for gram in grams]
+
+
+class CourseVectorIndex:
+    """Sparse, L2-normalized TF-IDF vectors over a catalog's courses, grouped by dimension."""
+
+    def __init__(self, courses: Sequence[Course]):
+        self.courses = list(courses)
+
+        rows: List[int] = []
+        dims: List[int] = []
+        counts: List[float] = []
+        for row, course in enumerate(self.courses):
+            weights: Dict[int, float] = {}
+            for dim in _features(course.title):
+                weights[dim] = weights.get(dim, 0) + TITLE_WEIGHT
+            for dim in _features(course.description):
+                weights[dim] = weights.get(dim, 0) + 1
+            rows.extend([row] * len(weights))
+            dims.extend(weights)
+            counts.extend(weights.values())
+
+        row_ids = np.array(rows, dtype=np.int64)
+        dim_ids = np.array(dims, dtype=np.int64)
+        document_frequency = np.bincount(dim_ids, minlength=VECTOR_DIMENSIONS)
+        self._idf = (np.log((1 + len(self.courses)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        values = np.log1p(np.array(counts, dtype=np.float32)) * self._idf[dim_ids]
+        norms = np.sqrt(np.bincount(row_ids, weights=values * values, minlength=len(self.courses)))
+        norms[norms == 0] = 1
+        values = values / norms[row_ids]
+
+        # Entries of one dimension are contiguous, so a query term is a slice
+        order = np.argsort(dim_ids, kind="stable")
+        self._dims = dim_ids[order]
+        self._rows = row_ids[order]
+        self._values = values[order].astype(np.float32)
+
+        logger.info(f"Built course vectors: {len(self.courses)} courses, {len(self._values)} non-zero weights")
+
+    def top_k(self, text: str, limit: int = 15) -> List[Tuple[Course, float]]:
+        """
+        Rank courses by cosine similarity to a free-text goal.
+
+        Args:
+            text: Career goal or topic description
+            limit: Maximum number of courses to return
+
+        Returns:
+            List of (course, similarity) pairs, most similar first
+        """
+        features = _features(text)
+        if not features or limit <= 0 or not self.courses:
+            return []
+
+        dims, counts = np.unique(np.array(features, dtype=np.int64), return_counts=True)
+        query = np.log1p(counts.astype(np.float32)) * self._idf[dims]
+        query /= np.linalg.norm(query)
+
+        scores = np.zeros(len(self.courses), dtype=np.float32)
+        starts = np.searchsorted(self._dims, dims, side="left")
+        ends = np.searchsorted(self._dims, dims, side="right")
+        for start, end, weight in zip(starts, ends, query):
+            # A course appears at most once per dimension
+            scores[self._rows[start:end]] += self._values[start:end] * weight
+
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(self.courses[row], float(scores[row])) for row in top if scores[row] > 0]
+
+
+_index_lock = threading.Lock()
+_index_catalog = None
+_index_version = None
+_index = None
+
+
+def vector_index_for(catalog) -> CourseVectorIndex:
+    """
+    Return the vector index for a catalog, building it if needed.
+
+    The index is rebuilt whenever the catalog is replaced or updated in place.
+    Also used as the catalog cache's load hook, so the build normally happens
+    when the catalog is loaded rather than on a query.
+    """
+    global _index_catalog, _index_version, _index
+    with _index_lock:
+        if _index is None or _index_catalog is not catalog or _index_version != catalog.version:
+            # Read first: a patch applied during the build must trigger another one
+            version = catalog.version
+            _index = CourseVectorIndex(catalog.courses)
+            _index_catalog = catalog
+            _index_version = version
+        return _index
+
+
+def recommend_courses(catalog, goal: str, limit: int = 15) -> List[Tuple[Course, float]]:
+    """
+    Recommend courses for a career goal.
+
+    Args:
+        catalog: A CourseCatalog, or a catalog client that implements recommend()
+        goal: Free-text career goal
+        limit: Maximum number of courses to return
+
+    Returns:
+        List of (course, similarity) pairs, most similar first
+    """
+    remote = getattr(catalog, "recommend", None)
+    if remote is not None:
+        return remote(goal, limit)
+    return vector_index_for(catalog).top_k(goal, limit)
@@ -0,0 +1,196 @@
+"""
+Fast Path
+Answers simple, unambiguous requests without the model. Each agent registers
+routes: an intent keyword (e.g. "jobs"), the extra words the intent may use,
+and a handler that calls the agent's tool directly and renders a templated
+response. A route only fires when every word of the query is either part of
+an entity found by query_router or a known word of the route, so anything
+with extra detail ("remote python jobs paying over 150k") still goes to the
+agent. A handler may also decline, e.g. when the query names two job titles
+or the tool returns an error. Every routing decision is logged.
+
+Set FAST_PATH_ENABLED=false to send every request to the agent.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from query_router import QueryEntities, extract_entities
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MAX_QUERY_WORDS = 16
+MAX_LISTED_ITEMS = 10
+FILLER_WORDS = frozenset(
+    "a an the i me my we our you for of to in on at near around with from by and or "
+    "show find list search get give see what which are is there any all some please can could "
+    "do does want need looking".split()
+)
+
+
+class Route:
+    """A fast-path intent and the handler that answers it."""
+
+    __slots__ = ("name", "triggers", "words", "handler")
+
+    def __init__(
+        self,
+        name: str,
+        triggers: Iterable[str],
+        handler: Callable[[str, QueryEntities], Optional[str]],
+        words: Iterable[str] = ()
+    ):
+        self.name = name
+        self.triggers = frozenset(triggers)
+        self.words = FILLER_WORDS | self.triggers | frozenset(words)
+        self.handler = handler
+
+
+class FastPathRouter:
+    """
+    Routes simple queries straight to a tool.
+
+    Thread-safe; one instance per agent.
+    """
+
+    def __init__(self, agent_name: str):
+        self.agent_name = agent_name
+        self.enabled = os.getenv("FAST_PATH_ENABLED", "true").strip().lower() != "false"
+        self._routes: List[Route] = []
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "declined": 0, "errors": 0}
+
+    def add(
+        self,
+        name: str,
+        triggers: Iterable[str],
+        handler: Callable[[str, QueryEntities], Optional[str]],
+        words: Iterable[str] = ()
+    ):
+        """
+        Register a route.
+
+        Args:
+            name: Route name used in logs
+            triggers: Words that signal the intent; one must appear in the query
+            handler: Answers the query given its text and entities, or returns None to decline
+            words: Other words the query may contain besides entities and filler words
+        """
+        self._routes.append(Route(name, triggers, handler, words))
+
+    def route(self, query: str) -> Optional[str]:
+        """
+        Answer a query on the fast path.
+
+        Args:
+            query: User query
+
+        Returns:
+            Rendered response, or None if the query should go to the agent
+        """
+        if not self.enabled:
+            return None
+
+        started = time.perf_counter()
+        entities = extract_entities(query)
+        words = entities.residual
+        if len(query.split()) > MAX_QUERY_WORDS:
+            return self._decide("misses", "miss", None, f"query longer than {MAX_QUERY_WORDS} words", started)
+
+        reason = "no intent keyword"
+        for route in self._routes:
+            if not route.triggers.intersection(words):
+                continue
+            unknown = [word for word in words if word not in route.words]
+            if unknown:
+                reason = f"unrecognized words {unknown[:5]}"
+                continue
+            try:
+                response = route.handler(query, entities)
+            except Exception as e:
+                logger.error(f"Fast path [{self.agent_name}] route {route.name} failed: {e}", exc_info=True)
+                return self._decide("errors", "error", route.name, str(e), started)
+            if response is None:
+                return self._decide("declined", "declined", route.name, f"handler declined {entities}", started)
+            return self._decide("hits", "hit", route.name, str(entities), started, response)
+
+        return self._decide("misses", "miss", None, reason, started)
+
+    def stats(self) -> Dict[str, int]:
+        """Return routing decision counters."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _decide(
+        self,
+        counter: str,
+        decision: str,
+        route_name: Optional[str],
+        reason: str,
+        started: float,
+        response: Optional[str] = None
+    ) -> Optional[str]:
+        with self._lock:
+            self._stats[counter] += 1
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"Fast path [{self.agent_name}] {decision}: route={route_name or '-'} ({reason}) "
+            f"in {elapsed_ms:.1f}ms -> {'fast path' if response is not None else 'agent'}"
+        )
+        return response
+
+
+def rows(result: Dict, key: str) -> List[Dict]:
+    """Return a tool result's rows, restoring fields that compaction hoisted into "<key>_common"."""
+    common = result.get(f"{key}_common", {})
+    return [dict(common, **row) for row in result.get(key, [])]
+
+
+def _more(shown: int, total: int) -> str:
+    return f"\n\n...and {total - shown} more." if total > shown else ""
+
+
+def render_jobs(heading: str, jobs: List[Dict], total: Optional[int] = None) -> str:
+    """Render job rows with title, company, location and apply link."""
+    if not jobs:
+        return f"{heading}\n\nNo openings found right now. Try a nearby city or a broader title."
+    lines = [heading, ""]
+    for number, job in enumerate(jobs[:MAX_LISTED_ITEMS], 1):
+        company = job.get("company") or job.get("company_name") or "Unknown company"
+        lines.append(f"{number}. **{job.get('title', 'Untitled role')}** at {company} ({job.get('location', 'n/a')})")
+        if job.get("link"):
+            lines.append(f"   Apply: {job['link']}")
+    return "\n".join(lines) + _more(min(len(jobs), MAX_LISTED_ITEMS), total or len(jobs))
+
+
+def render_courses(heading: str, courses: List[Dict], total: Optional[int] = None) -> str:
+    """Render course rows with code, title and credit hours."""
+    if not courses:
+        return f"{heading}\n\nNo matching courses were found in the catalog."
+    lines = [heading, ""]
+    for course in courses[:MAX_LISTED_ITEMS]:
+        code = course.get("code") or f"{course.get('subject_prefix', '')} {course.get('course_number', '')}".strip()
+        credits = f" ({course['credit_hours']} credit hours)" if course.get("credit_hours") else ""
+        lines.append(f"- **{code}**: {course.get('title', '')}{credits}")
+    return "\n".join(lines) + _more(min(len(courses), MAX_LISTED_ITEMS), total or len(courses))
+
+
+def render_projects(heading: str, projects: List[Dict]) -> str:
+    """Render project rows with description, skills and duration."""
+    if not projects:
+        return f"{heading}\n\nNo matching projects were found."
+    lines = [heading]
+    for number, project in enumerate(projects[:MAX_LISTED_ITEMS], 1):
+        lines.append("")
+        lines.append(f"{number}. **{project.get('name', 'Project')}**: {project.get('description', '')}")
+        if project.get("skills"):
+            lines.append(f"   Skills: {', '.join(project['skills'])}")
+        details = [f"{label}: {project[field]}" for label, field in (("Difficulty", "difficulty"), ("Duration", "duration"))
+                   if project.get(field)]
+        if details:
+            lines.append(f"   {' | '.join(details)}")
+    return "\n".join(lines)
@@ -0,0 +1,342 @@
+"""
+HTTP Client
+Shared outbound HTTP layer for SerpAPI, Nebula and peer agent calls.
+Connections are pooled per (scheme, host, port) and kept alive between
+requests, responses are requested gzip-compressed and decompressed as they
+are read, and errors are raised as urllib.error.HTTPError / URLError so
+callers keep the same error handling as with urllib.request.urlopen.
+Redirects are followed as urlopen follows them, and hosts that an
+HTTP(S)_PROXY setting applies to are reached through urlopen itself.
+Requests tagged with an upstream name are paced and retried by that
+upstream's rate limiter, fail fast while its circuit breaker is open, and
+are recorded or replayed when UPSTREAM_MODE asks for it (see record_replay).
+"""
+
+import gzip
+import http.client
+import io
+import logging
+import os
+import socket
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+import circuit_breaker
+import rate_limiter
+import record_replay
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 15
+DEFAULT_IDLE_TIMEOUT = 60
+MAX_REDIRECTS = 5
+REDIRECT_STATUS = frozenset({301, 302, 303, 307, 308})
+# Only these are resent on a fresh connection when a reused one turns out to be closed
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Other requests only reuse connections idle for less than this, well under common
+# server keep-alive timeouts, since they cannot be resent safely
+NON_IDEMPOTENT_MAX_IDLE_SECONDS = 2.0
+
+# Errors that mean a kept-alive connection was closed by the server while idle
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class PooledResponse:
+    """
+    Response that returns its connection to the pool once fully read.
+
+    Supports read(), the `status` and `headers` attributes and use as a
+    context manager, like the object returned by urllib.request.urlopen.
+    """
+
+    def __init__(self, client: "HTTPClient", pool_key: Tuple, conn, raw: http.client.HTTPResponse, url: str):
+        self._client = client
+        self._pool_key = pool_key
+        self._conn = conn
+        self._raw = raw
+        self.url = url
+        self.status = raw.status
+        self.reason = raw.reason
+        self.headers = raw.headers
+        if (raw.getheader("Content-Encoding") or "").lower() == "gzip":
+            self._body = gzip.GzipFile(fileobj=raw, mode="rb")
+        else:
+            self._body = raw
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self._body.read() if amt is None else self._body.read(amt)
+
+    def getheader(self, name: str, default=None):
+        return self._raw.getheader(name, default)
+
+    def close(self):
+        """Release the connection: back to the pool if the body was fully read, else discard it."""
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        if self._raw.isclosed() and not self._raw.will_close:
+            self._client._release(self._pool_key, conn)
+        else:
+            self._raw.close()
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class HTTPClient:
+    """
+    Keep-alive HTTP client with a connection pool per host.
+
+    Up to `pool_size` idle connections are kept per host. Requests beyond
+    that open extra connections, which are closed instead of pooled when
+    released. Idle connections older than `idle_timeout` are discarded.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT
+    ):
+        self._pool_size = pool_size
+        self._timeout = timeout
+        self._idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._pools: Dict[Tuple, List[Tuple[float, http.client.HTTPConnection]]] = {}
+        self._ssl_context = ssl.create_default_context()
+        self._proxies = urllib.request.getproxies()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+        upstream: Optional[str] = None
+    ):
+        """
+        Send a request over a pooled connection.
+
+        Args:
+            method: HTTP method
+            url: Absolute http(s) URL
+            headers: Optional request headers
+            data: Optional request body
+            timeout: Socket timeout in seconds (default: client timeout)
+            upstream: Rate limiter and circuit breaker name (e.g. "serpapi");
+                None sends unthrottled
+
+        Returns:
+            PooledResponse for a 2xx response, after following redirects (a
+            RecordedResponse in record mode, the urlopen response when proxied)
+
+        Raises:
+            urllib.error.HTTPError: For non-2xx responses
+            urllib.error.URLError: If the connection could not be established
+            rate_limiter.UpstreamUnavailable: If the upstream's limiter refused
+                the request, it kept failing with 429/5xx, or its circuit is open
+        """
+        if upstream is None:
+            return self._send(method, url, headers, data, timeout)
+
+        upstream_mode = record_replay.mode()
+        if upstream_mode == "replay":
+            url, headers = record_replay.replay_target(url, headers)
+
+        def send():
+            if upstream_mode == "record":
+                return record_replay.record(
+                    method, url, data, lambda: self._send(method, url, headers, data, timeout)
+                )
+            return self._send(method, url, headers, data, timeout)
+
+        limiter = rate_limiter.get_limiter(upstream)
+        return circuit_breaker.get_breaker(upstream).call(lambda: limiter.call(send))
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        data: Optional[bytes],
+        timeout: Optional[float]
+    ):
+        timeout = self._timeout if timeout is None else timeout
+        for _ in range(MAX_REDIRECTS + 1):
+            if self._uses_proxy(url):
+                request = urllib.request.Request(url, data=data, headers=headers or {}, method=method)
+                return urllib.request.urlopen(request, timeout=timeout)
+
+            response = self._send_once(method, url, headers, data, timeout)
+            location = response.getheader("Location")
+            if response.status in REDIRECT_STATUS and location:
+                # Drain the body so the connection can be reused
+                try:
+                    response.read()
+                finally:
+                    response.close()
+                url = urllib.parse.urljoin(url, location)
+                if response.status == 303 or (response.status in (301, 302) and method not in ("GET", "HEAD")):
+                    # Resent as a GET without the body, as urlopen does
+                    method, data = "GET", None
+                    headers = {
+                        name: value for name, value in (headers or {}).items()
+                        if name.lower() not in ("content-type", "content-length")
+                    }
+                continue
+
+            if response.status >= 300:
+                # Read the body so the connection can be reused, then raise like urlopen does
+                try:
+                    body = response.read()
+                finally:
+                    response.close()
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, io.BytesIO(body))
+            return response
+
+        raise urllib.error.HTTPError(url, response.status, f"More than {MAX_REDIRECTS} redirects", response.headers, None)
+
+    def _uses_proxy(self, url: str) -> bool:
+        if not self._proxies:
+            return False
+        parts = urllib.parse.urlsplit(url)
+        return parts.scheme in self._proxies and not urllib.request.proxy_bypass(parts.hostname or "")
+
+    def _send_once(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        data: Optional[bytes],
+        timeout: float
+    ) -> PooledResponse:
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {url}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        pool_key = (parts.scheme, parts.hostname, port)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        request_headers = {"Accept-Encoding": "gzip", "Connection": "keep-alive"}
+        request_headers.update(headers or {})
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        max_idle = self._idle_timeout if idempotent else min(self._idle_timeout, NON_IDEMPOTENT_MAX_IDLE_SECONDS)
+
+        while True:
+            conn, reused = self._acquire(pool_key, timeout, max_idle)
+            try:
+                conn.request(method, path, body=data, headers=request_headers)
+                raw = conn.getresponse()
+                break
+            except _STALE_CONNECTION_ERRORS as e:
+                conn.close()
+                # The server may already have acted on a non-idempotent request
+                if reused and idempotent:
+                    logger.debug(f"Retrying on a fresh connection to {parts.hostname}: {e!r}")
+                    continue
+                raise urllib.error.URLError(e)
+            except (socket.gaierror, ConnectionRefusedError, ssl.SSLError) as e:
+                conn.close()
+                raise urllib.error.URLError(e)
+            except BaseException:
+                conn.close()
+                raise
+
+        return PooledResponse(self, pool_key, conn, raw, url)
+
+    def close(self):
+        """Close every idle pooled connection."""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for idle in pools.values():
+            for _, conn in idle:
+                conn.close()
+
+    def _acquire(self, pool_key: Tuple, timeout: float, max_idle: float) -> Tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        with self._lock:
+            idle = self._pools.get(pool_key, [])
+            # The most recently released connection is last
+            while idle:
+                released_at, conn = idle[-1]
+                if now - released_at >= self._idle_timeout:
+                    idle.pop()
+                    conn.close()
+                    continue
+                if now - released_at >= max_idle:
+                    break
+                idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+
+        scheme, host, port = pool_key
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        return conn, False
+
+    def _release(self, pool_key: Tuple, conn: http.client.HTTPConnection):
+        with self._lock:
+            idle = self._pools.setdefault(pool_key, [])
+            if len(idle) < self._pool_size:
+                idle.append((time.monotonic(), conn))
+                return
+        conn.close()
+
+
+_default_client: Optional[HTTPClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_client() -> HTTPClient:
+    """
+    Return the process-wide client, creating it on first use.
+
+    Pool size and timeouts come from HTTP_POOL_SIZE, HTTP_TIMEOUT and
+    HTTP_IDLE_TIMEOUT, read when the client is created (i.e. after the
+    agents have loaded their .env file).
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HTTPClient(
+                pool_size=int(os.getenv("HTTP_POOL_SIZE", str(DEFAULT_POOL_SIZE))),
+                timeout=float(os.getenv("HTTP_TIMEOUT", str(DEFAULT_TIMEOUT))),
+                idle_timeout=float(os.getenv("HTTP_IDLE_TIMEOUT", str(DEFAULT_IDLE_TIMEOUT)))
+            )
+        return _default_client
+
+
+def request(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    data: Optional[bytes] = None,
+    timeout: Optional[float] = None,
+    upstream: Optional[str] = None
+) -> PooledResponse:
+    """Send a request through the process-wide client. See HTTPClient.request."""
+    return get_client().request(method, url, headers=headers, data=data, timeout=timeout, upstream=upstream)
@@ -1,12 +1,16 @@
 from bedrock_agentcore import BedrockAgentCoreApp
 from strands import Agent, tool
 from strands.models import BedrockModel
-import json
-import urllib.request
-import urllib.parse
 import logging
 import os
+from typing import List, Optional
 from dotenv import load_dotenv
+from job_search import MAX_PARALLEL_SEARCHES, STALE_RESULTS_NOTE, JobSearchCache, search_google_jobs, search_google_jobs_multi
+from rate_limiter import UpstreamUnavailable, ledger
+from circuit_breaker import breaker_stats
+from fast_path import FastPathRouter, render_jobs, rows
+from query_router import KNOWN_COUNTRIES, QueryEntities
+from tool_compaction import compact_result
 
 # Load environment variables from .env file
 load_dotenv()
@@ -18,6 +22,13 @@ logger.setLevel(logging.INFO)
 # Configuration
 SERPAPI_KEY = os.getenv("SERPAPI_KEY")
 MAX_DESC_LENGTH = 200
+MAX_JOB_RESULTS = 100
+MAX_APPLY_LINKS = 3
+MAX_SEARCH_LOCATIONS = MAX_PARALLEL_SEARCHES  # Searched in a single parallel wave
+JOB_CACHE_TTL_SECONDS = int(os.getenv("JOB_CACHE_TTL_SECONDS", "21600"))
+JOB_CACHE_MAX_ENTRIES = int(os.getenv("JOB_CACHE_MAX_ENTRIES", "256"))
+JOB_CACHE_DB_PATH = os.getenv("JOB_CACHE_DB_PATH", "")
+JOB_CACHE_STALE_SECONDS = int(os.getenv("JOB_CACHE_STALE_SECONDS", "86400"))
 
 # Validate required environment variables
 if not SERPAPI_KEY:
@@ -26,6 +37,14 @@ if not SERPAPI_KEY:
 # Initialize BedrockAgentCore app
 app = BedrockAgentCoreApp()
 
+# Job search results cache (in-memory LRU, optionally backed by SQLite)
+job_cache = JobSearchCache(
+    max_entries=JOB_CACHE_MAX_ENTRIES,
+    ttl=JOB_CACHE_TTL_SECONDS,
+    db_path=JOB_CACHE_DB_PATH,
+    stale_ttl=JOB_CACHE_STALE_SECONDS
+)
+
 
 def truncate(text, length=MAX_DESC_LENGTH):
     """Truncate text to specified length"""
@@ -35,8 +54,21 @@ def truncate(text, length=MAX_DESC_LENGTH):
     return text if len(text) <= length else text[:length].rstrip() + "..."
 
 
+def compact_job(j):
+    """Build the tool output dict for a raw SerpAPI job result"""
+    return {
+        "title": j.get("title", ""),
+        "company": j.get("company_name", ""),
+        "location": j.get("location", ""),
+        "via": j.get("source", ""),
+        "link": (j.get("apply_options") or [{}])[0].get("link", ""),
+        "more_links": [o.get("link", "") for o in (j.get("apply_options") or [])[1:MAX_APPLY_LINKS]],
+        "description": truncate(j.get("description", "")).replace("\n", " ")
+    }
+
+
 @tool
-def search_jobs(job_title: str, location: str = "New York", country: str = "USA") -> dict:
+def search_jobs(job_title: str, location: str = "New York", country: str = "USA", max_results: int = 10) -> dict:
     """
     Search for job listings using SerpAPI.
 
@@ -44,37 +76,105 @@ def search_jobs(job_title: str, location: str = "New York", country: str = "USA"
         job_title: The job title or role to search for
         location: The city or region to search in
         country: The country to search in
+        max_results: Maximum number of jobs to return (default: 10, max: 100)
 
     Returns:
         A dictionary containing job search results
     """
-    query = f"{job_title} in {location}, {country}"
-    url = f"https://serpapi.com/search.json?{urllib.parse.urlencode({'engine': 'google_jobs', 'q': query, 'hl': 'en', 'api_key': SERPAPI_KEY})}"
+    try:
+        jobs = search_google_jobs(
+            job_title, location, country, SERPAPI_KEY,
+            cache=job_cache,
+            timeout=10,
+            max_results=max(1, min(max_results, MAX_JOB_RESULTS))
+        )
+    except UpstreamUnavailable as e:
+        logger.warning(f"SerpAPI unavailable: {e}")
+        return e.to_dict()
+    except Exception as e:
+        logger.error(f"Error fetching jobs: {e}")
+        return {"error": f"Failed to fetch job listings: {str(e)}"}
+
+    logger.debug(f"Job cache stats: {job_cache.stats()}, upstream quota: {ledger()}, circuits: {breaker_stats()}")
+    compact_jobs = [compact_job(j) for j in jobs]
+
+    result = {
+        "count": len(compact_jobs),
+        "results": compact_jobs
+    }
+    if any(j.get("stale") for j in jobs):
+        result["note"] = STALE_RESULTS_NOTE
+    return compact_result("search_jobs", result)
+
+
+@tool
+def search_jobs_in_locations(
+    job_title: str,
+    locations: List[str],
+    country: str = "USA",
+    max_results_per_location: int = 10
+) -> dict:
+    """
+    Search for the same job in several locations at once.
+
+    Use this instead of calling search_jobs once per city. All locations are
+    searched in parallel and the results are merged into one ranked list with
+    duplicate postings removed.
+
+    Args:
+        job_title: The job title or role to search for
+        locations: Cities or regions to search in (e.g., ['Austin', 'Dallas', 'Seattle'])
+        country: The country to search in
+        max_results_per_location: Maximum number of jobs per location (default: 10, max: 100)
+
+    Returns:
+        A dictionary with merged job results and per-location counts
+    """
+    if not locations:
+        return {"error": "Provide at least one location"}
 
     try:
-        with urllib.request.urlopen(url, timeout=10) as response:
-            data = json.loads(response.read().decode("utf-8"))
+        jobs, errors = search_google_jobs_multi(
+            job_title, locations[:MAX_SEARCH_LOCATIONS], country, SERPAPI_KEY,
+            cache=job_cache,
+            timeout=10,
+            max_results_per_location=max(1, min(max_results_per_location, MAX_JOB_RESULTS))
+        )
     except Exception as e:
         logger.error(f"Error fetching jobs: {e}")
         return {"error": f"Failed to fetch job listings: {str(e)}"}
 
-    jobs = data.get("jobs_results", [])
-    compact_jobs = [
-        {
-            "title": j.get("title", ""),
-            "company": j.get("company_name", ""),
-            "location": j.get("location", ""),
-            "via": j.get("source", ""),
-            "link": j.get("apply_options", [{}])[0].get("link", ""),
-            "description": truncate(j.get("description", "")).replace("\n", " ")
-        }
-        for j in jobs
-    ]
+    if not jobs and errors:
+        error = next(iter(errors.values()))
+        if isinstance(error, UpstreamUnavailable):
+            logger.warning(f"SerpAPI unavailable: {error}")
+            return error.to_dict()
+        return {"error": f"Failed to fetch job listings: {str(error)}"}
 
-    return {
+    logger.debug(f"Job cache stats: {job_cache.stats()}, upstream quota: {ledger()}, circuits: {breaker_stats()}")
+    per_location = {}
+    compact_jobs = []
+    for j in jobs:
+        per_location[j["search_location"]] = per_location.get(j["search_location"], 0) + 1
+        result = compact_job(j)
+        result["search_location"] = j["search_location"]
+        compact_jobs.append(result)
+
+    result = {
         "count": len(compact_jobs),
+        "per_location": per_location,
         "results": compact_jobs
     }
+    if errors:
+        result["failed_locations"] = {location: str(e) for location, e in errors.items()}
+    notes = []
+    if any(j.get("stale") for j in jobs):
+        notes.append(STALE_RESULTS_NOTE)
+    if len(locations) > MAX_SEARCH_LOCATIONS:
+        notes.append(f"Only the first {MAX_SEARCH_LOCATIONS} locations were searched.")
+    if notes:
+        result["note"] = " ".join(notes)
+    return compact_result("search_jobs_in_locations", result)
 
 
 # Configure the Strands agent with Amazon Nova Pro
@@ -92,12 +192,40 @@ Your role is to help users find job opportunities based on their preferences.
 
 When a user asks about jobs:
 1. Extract the job title and location from their request
-2. Use the search_jobs tool to find relevant positions
+2. Use the search_jobs tool to find relevant positions; set max_results only when the user asks for more than 10 jobs
+   - When the user names several locations, call search_jobs_in_locations once with all of them
 3. Present the results in a clear, helpful manner
 4. If no specific details are provided, use sensible defaults (software engineer in New York, USA)
 
 Be conversational, helpful, and provide actionable information.""",
-    tools=[search_jobs]
+    tools=[search_jobs, search_jobs_in_locations]
+)
+
+
+def fast_job_search(query: str, entities: QueryEntities) -> Optional[str]:
+    """Answer "<title> jobs [in <location>]" with a direct search."""
+    # Seniority words ("senior", "grad") refine the search beyond a plain title
+    if len(entities.titles) != 1 or entities.levels or len(entities.locations) > 1 or len(entities.countries) > 1:
+        return None
+    location, country = entities.job_location(default=("New York", "USA"))
+    if country not in KNOWN_COUNTRIES:
+        return None
+    result = search_jobs(entities.titles[0], location, country)
+    if "error" in result:
+        return None
+    return render_jobs(
+        f"Here are {entities.titles[0]} openings in {location}, {country}:",
+        rows(result, "results"),
+        result.get("count")
+    )
+
+
+fast_path = FastPathRouter("job_agent")
+fast_path.add(
+    "job_search",
+    triggers=("job", "jobs", "openings", "positions", "roles", "listings", "vacancies"),
+    handler=fast_job_search,
+    words=("open", "current", "latest", "new", "hiring", "available")
 )
 
 
@@ -116,6 +244,13 @@ def invoke_agentcore(payload):
 
         logger.info(f"Processing request: {user_input}")
 
+        # Simple, unambiguous requests are answered without the model
+        fast_response = fast_path.route(user_input)
+        if fast_response is not None:
+            return {
+                "response": fast_response
+            }
+
         # Invoke the Strands agent
         result = agent(user_input)
 
@@ -0,0 +1,150 @@
+"""
+Job Deduplication
+Collapses the same posting syndicated through several Google Jobs sources
+into one result. Postings are clustered by a normalized (title, company,
+location) key and by MinHash similarity of their description shingles, with
+LSH banding so each posting is only compared against postings that share a
+band. The first posting of a cluster is kept and the apply links of the
+others are merged into it. Each posting is processed once, so deduplication
+is linear in the number of results.
+"""
+
+import logging
+import random
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SHINGLE_SIZE = 3  # Words per description shingle
+MAX_SHINGLE_WORDS = 300  # Only the start of long descriptions is compared
+NUM_HASHES = 16
+LSH_BANDS = 4  # NUM_HASHES must be divisible by LSH_BANDS
+SIMILARITY_THRESHOLD = 0.8
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+PARENTHETICAL_PATTERN = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+COMPANY_SUFFIXES = frozenset(
+    "inc incorporated llc ltd limited corp corporation co company plc gmbh lp llp".split()
+)
+
+# Each hash function permutes the 32-bit shingle hashes by XOR with a fixed random mask
+_rng = random.Random(0x5EED)
+_HASH_MASKS = [_rng.getrandbits(32) for _ in range(NUM_HASHES)]
+_ROWS_PER_BAND = NUM_HASHES // LSH_BANDS
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """Lower-case a job title and drop punctuation and parenthetical notes such as "(Remote)"."""
+    return " ".join(TOKEN_PATTERN.findall(PARENTHETICAL_PATTERN.sub(" ", (title or "").lower())))
+
+
+def normalize_company(company: Optional[str]) -> str:
+    """Lower-case a company name and drop legal suffixes such as "Inc." or "LLC"."""
+    return " ".join(token for token in TOKEN_PATTERN.findall((company or "").lower()) if token not in COMPANY_SUFFIXES)
+
+
+def normalize_location(location: Optional[str]) -> str:
+    """Lower-case a posting location and drop notes such as "(+2 others)"."""
+    return normalize_title(location)
+
+
+def minhash(text: Optional[str]) -> Optional[Tuple[int, ...]]:
+    """
+    Compute the MinHash signature of a text's word shingles.
+
+    Returns:
+        Tuple of NUM_HASHES minimums, or None if the text has too few words
+    """
+    words = TOKEN_PATTERN.findall((text or "").lower())[:MAX_SHINGLE_WORDS]
+    if len(words) < SHINGLE_SIZE:
+        return None
+    shingles = {
+        zlib.crc32(" ".join(words[i:i + SHINGLE_SIZE]).encode("utf-8"))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+    return tuple(min(shingle ^ mask for shingle in shingles) for mask in _HASH_MASKS)
+
+
+def _similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+    """Estimate the Jaccard similarity of two MinHash signatures."""
+    return sum(1 for x, y in zip(first, second) if x == y) / NUM_HASHES
+
+
+class JobDeduplicator:
+    """
+    Incremental near-duplicate filter over raw SerpAPI job results.
+
+    Jobs are added one at a time, so it can consume a lazily paged result
+    stream. `jobs` holds one representative per cluster, in first-seen
+    order; representatives are copies, so cached results are never modified.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.jobs: List[Dict] = []
+        self.duplicates = 0
+        self._threshold = threshold
+        self._by_key: Dict[Tuple[str, str, str], int] = {}
+        self._buckets: Dict[Tuple, List[int]] = {}
+        self._signatures: List[Optional[Tuple[int, ...]]] = []
+        self._scopes: List[Tuple[str, str]] = []
+        self._links: List[set] = []
+
+    def add(self, job: Dict) -> bool:
+        """
+        Add a job result.
+
+        Returns:
+            True if the job starts a new cluster, False if it was merged
+            into an existing one
+        """
+        # Only postings by the same company for the same location can be duplicates
+        scope = (normalize_company(job.get("company_name")), normalize_location(job.get("location")))
+        key = (normalize_title(job.get("title")),) + scope
+        signature = minhash(job.get("description"))
+        bands = []
+        if signature is not None:
+            bands = [
+                (band, signature[band * _ROWS_PER_BAND:(band + 1) * _ROWS_PER_BAND])
+                for band in range(LSH_BANDS)
+            ]
+
+        match = self._by_key.get(key)
+        if match is None:
+            for band in bands:
+                for candidate in self._buckets.get(band, ()):
+                    if (
+                        self._scopes[candidate] == scope
+                        and _similarity(signature, self._signatures[candidate]) >= self._threshold
+                    ):
+                        match = candidate
+                        break
+                if match is not None:
+                    break
+
+        if match is not None:
+            self._merge(match, job)
+            self.duplicates += 1
+            return False
+
+        index = len(self.jobs)
+        representative = dict(job)
+        representative["apply_options"] = list(job.get("apply_options") or [])
+        self.jobs.append(representative)
+        self._signatures.append(signature)
+        self._scopes.append(scope)
+        self._links.append({option.get("link") for option in representative["apply_options"]})
+        self._by_key[key] = index
+        for band in bands:
+            self._buckets.setdefault(band, []).append(index)
+        return True
+
+    def _merge(self, index: int, job: Dict):
+        representative = self.jobs[index]
+        links = self._links[index]
+        for option in job.get("apply_options") or []:
+            if option.get("link") not in links:
+                links.add(option.get("link"))
+                representative["apply_options"].append(option)
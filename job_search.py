@@ -0,0 +1,404 @@
+"""
+Job Search
+Shared SerpAPI Google Jobs client used by the job agent and the orchestrator.
+Results are cached by normalized (title, location, country) query in a
+two-tier cache: an in-memory LRU and an optional SQLite database that
+survives restarts. Every entry expires after a TTL. Concurrent cache misses
+for the same query share a single upstream request. Expired entries are kept
+for a while longer and served, marked "stale", when SerpAPI is unavailable
+(e.g. its circuit breaker is open).
+
+Results are paged lazily: iter_google_jobs follows SerpAPI's
+next_page_token only when the consumer reads past the current page, and
+each page is cached under its own key. search_google_jobs merges
+near-duplicate postings (see job_dedup) before applying max_results.
+search_google_jobs_multi runs one search per location on a bounded thread
+pool and merges the results.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import http_client
+from job_dedup import JobDeduplicator
+from rate_limiter import UpstreamUnavailable
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SERPAPI_URL = "https://serpapi.com/search.json"
+DEFAULT_TIMEOUT = 10
+DEFAULT_CACHE_TTL_SECONDS = 6 * 3600
+DEFAULT_CACHE_MAX_ENTRIES = 256
+DEFAULT_STALE_SECONDS = 24 * 3600  # How long expired results remain available as a fallback
+DEFAULT_MAX_RESULTS = 10  # One SerpAPI Google Jobs page
+MAX_PAGES = 10
+MAX_PARALLEL_SEARCHES = 8  # Enough for every location of one multi-location search at once
+# Added by tools under "note" when any job in their result is stale
+STALE_RESULTS_NOTE = ("Live job search is temporarily unavailable; these are cached results and some postings "
+                      "may have closed. Tell the user the listings may be out of date.")
+
+# Coalesces concurrent identical SerpAPI requests within this process
+_in_flight = SingleFlight()
+
+# Shared by all multi-location searches, bounding concurrent SerpAPI requests per process
+_search_pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL_SEARCHES, thread_name_prefix="job-search")
+
+
+def normalize_query(job_title: str, location: str, country: str) -> str:
+    """Build the cache key of a search, normalized so equivalent searches share it."""
+    parts = [" ".join((part or "").lower().split()) for part in (job_title, location, country)]
+    return f"{parts[0]} in {parts[1]}, {parts[2]}"
+
+
+class JobSearchCache:
+    """
+    LRU + TTL cache of job search results with an optional SQLite tier.
+
+    Lookups check memory first, then SQLite; SQLite hits are promoted back
+    into memory. Entries are written to both tiers. Expired entries are
+    kept for `stale_ttl` more seconds for get_stale().
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+        ttl: float = DEFAULT_CACHE_TTL_SECONDS,
+        db_path: str = "",
+        stale_ttl: float = DEFAULT_STALE_SECONDS
+    ):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "stale_hits": 0,
+        }
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS job_search_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM job_search_cache WHERE expires_at <= ?", (time.time() - stale_ttl,))
+            self._db.commit()
+
+    def get(self, key: str):
+        """Return the cached value for `key`, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return value
+                if now - expires_at > self._stale_ttl:
+                    del self._entries[key]
+                self._stats["expired"] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM job_search_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    value = json.loads(row[0])
+                    self._remember(key, value, row[1])
+                    self._stats["hits"] += 1
+                    self._stats["disk_hits"] += 1
+                    return value
+
+            self._stats["misses"] += 1
+            return None
+
+    def get_stale(self, key: str) -> Optional[Tuple[object, float]]:
+        """
+        Return a cached value for `key` even if it has expired, as a last-known-good fallback.
+
+        Returns:
+            Tuple of (value, seconds since it was cached), or None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+            elif self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM job_search_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                value, expires_at = json.loads(row[0]), row[1]
+            else:
+                return None
+
+            if now - expires_at > self._stale_ttl:
+                return None
+            self._stats["stale_hits"] += 1
+            return value, now - (expires_at - self._ttl)
+
+    def put(self, key: str, value):
+        """Store `value` under `key` in every tier."""
+        expires_at = time.time() + self._ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO job_search_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at)
+                )
+                self._db.commit()
+
+    def stats(self) -> Dict:
+        """Return a copy of the hit/miss counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+    def _remember(self, key: str, value, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+
+def fetch_jobs_page(
+    job_title: str,
+    location: str,
+    country: str,
+    api_key: str,
+    page_token: str = "",
+    cache: Optional[JobSearchCache] = None,
+    timeout: int = DEFAULT_TIMEOUT
+) -> Tuple[List[Dict], str]:
+    """
+    Fetch one page of Google Jobs results through SerpAPI.
+
+    Args:
+        job_title: The job title or role to search for
+        location: The city or region to search in
+        country: The country to search in
+        api_key: SerpAPI key
+        page_token: next_page_token of the previous page; empty for the first page
+        cache: Optional result cache
+        timeout: Request timeout in seconds, also the longest time to wait
+            for an identical request already in flight
+
+    Returns:
+        Tuple of (raw SerpAPI job results, next page token or "" on the last page).
+        If SerpAPI is unavailable, cached results past their TTL are returned
+        with "stale": True on every job.
+    """
+    # SerpAPI gets the query as written; only the cache key is normalized
+    query = f"{job_title} in {location}, {country}"
+    key = f"{normalize_query(job_title, location, country)}|{page_token}"
+
+    if cache is not None:
+        page = cache.get(key)
+        if page is not None:
+            logger.info(f"Job search cache hit for '{query}' (page token: {page_token or 'first'})")
+            return page["jobs"], page["next_page_token"]
+
+    def fetch() -> Dict:
+        params = {"engine": "google_jobs", "q": query, "hl": "en", "api_key": api_key}
+        if page_token:
+            params["next_page_token"] = page_token
+        url = f"{SERPAPI_URL}?{urllib.parse.urlencode(params)}"
+        started = time.monotonic()
+        with http_client.request("GET", url, timeout=timeout, upstream="serpapi") as response:
+            data = json.loads(response.read().decode("utf-8"))
+        page = {
+            "jobs": data.get("jobs_results", []),
+            "next_page_token": data.get("serpapi_pagination", {}).get("next_page_token", "")
+        }
+        logger.info(f"Fetched {len(page['jobs'])} jobs for '{query}' in {time.monotonic() - started:.2f}s")
+
+        # Don't cache upstream errors (e.g. exhausted quota) as if they were empty results
+        if cache is not None and "error" not in data:
+            cache.put(key, page)
+        return page
+
+    try:
+        page = _in_flight.do(key, fetch, timeout=timeout)
+    except urllib.error.HTTPError:
+        raise
+    except (UpstreamUnavailable, OSError) as e:
+        # SerpAPI is down, throttled or its circuit is open: fall back to the last results we had
+        stale = cache.get_stale(key) if cache is not None else None
+        if stale is None:
+            raise
+        page, age = stale
+        logger.warning(f"SerpAPI unavailable ({e}); serving results for '{query}' cached {age / 60:.0f} min ago")
+        return [dict(job, stale=True) for job in page["jobs"]], page["next_page_token"]
+    return page["jobs"], page["next_page_token"]
+
+
+def iter_google_jobs(
+    job_title: str,
+    location: str,
+    country: str,
+    api_key: str,
+    cache: Optional[JobSearchCache] = None,
+    timeout: int = DEFAULT_TIMEOUT,
+    max_pages: int = MAX_PAGES
+) -> Iterator[Dict]:
+    """
+    Lazily iterate over Google Jobs results across pages.
+
+    The next page is requested only once the consumer has read every job of
+    the current one, so stopping early never fetches unused pages.
+
+    Args:
+        job_title: The job title or role to search for
+        location: The city or region to search in
+        country: The country to search in
+        api_key: SerpAPI key
+        cache: Optional result cache
+        timeout: Request timeout in seconds
+        max_pages: Maximum number of pages to request
+
+    Yields:
+        Raw SerpAPI job results
+    """
+    page_token = ""
+    for _ in range(max_pages):
+        jobs, page_token = fetch_jobs_page(job_title, location, country, api_key, page_token, cache, timeout)
+        yield from jobs
+        if not jobs or not page_token:
+            return
+
+
+def search_google_jobs(
+    job_title: str,
+    location: str,
+    country: str,
+    api_key: str,
+    cache: Optional[JobSearchCache] = None,
+    timeout: int = DEFAULT_TIMEOUT,
+    max_results: int = DEFAULT_MAX_RESULTS,
+    dedupe: bool = True
+) -> List[Dict]:
+    """
+    Search Google Jobs through SerpAPI.
+
+    Args:
+        job_title: The job title or role to search for
+        location: The city or region to search in
+        country: The country to search in
+        api_key: SerpAPI key
+        cache: Optional result cache
+        timeout: Request timeout in seconds, also the longest time to wait
+            for an identical search already in flight
+        max_results: Maximum number of jobs to return; pages are fetched
+            only until this many jobs have been collected
+        dedupe: Merge postings syndicated through several sources into one
+            result with all of their apply links
+
+    Returns:
+        Raw SerpAPI job results. If a later page fails, the jobs collected
+        so far are returned.
+    """
+    deduplicator = JobDeduplicator() if dedupe else None
+    jobs: List[Dict] = deduplicator.jobs if deduplicator is not None else []
+    if max_results <= 0:
+        return jobs
+
+    try:
+        for job in iter_google_jobs(job_title, location, country, api_key, cache, timeout):
+            if deduplicator is not None:
+                deduplicator.add(job)
+            else:
+                jobs.append(job)
+            if len(jobs) >= max_results:
+                break
+    except Exception as e:
+        if not jobs:
+            raise
+        logger.warning(f"Stopped paging after {len(jobs)} jobs: {e}")
+
+    if deduplicator is not None and deduplicator.duplicates:
+        logger.info(f"Merged {deduplicator.duplicates} duplicate job postings")
+    return jobs
+
+
+def search_google_jobs_multi(
+    job_title: str,
+    locations: List[str],
+    country: str,
+    api_key: str,
+    cache: Optional[JobSearchCache] = None,
+    timeout: int = DEFAULT_TIMEOUT,
+    max_results_per_location: int = DEFAULT_MAX_RESULTS
+) -> Tuple[List[Dict], Dict[str, Exception]]:
+    """
+    Search several locations concurrently and merge the results.
+
+    Results are ranked by interleaving the locations' own rankings, so every
+    location is represented near the top, and postings found in more than
+    one location are merged. Each result records the location that found it
+    under "search_location".
+
+    Args:
+        job_title: The job title or role to search for
+        locations: Cities or regions to search in
+        country: The country to search in
+        api_key: SerpAPI key
+        cache: Optional result cache
+        timeout: Request timeout in seconds
+        max_results_per_location: Maximum number of jobs per location
+
+    Returns:
+        Tuple of (merged raw SerpAPI job results, errors by location)
+    """
+    locations = list(dict.fromkeys(location.strip() for location in locations if location and location.strip()))
+    futures = {
+        location: _search_pool.submit(
+            search_google_jobs, job_title, location, country, api_key, cache, timeout, max_results_per_location
+        )
+        for location in locations
+    }
+
+    results: Dict[str, List[Dict]] = {}
+    errors: Dict[str, Exception] = {}
+    for location, future in futures.items():
+        try:
+            results[location] = future.result()
+        except Exception as e:
+            logger.warning(f"Job search for '{job_title}' in {location} failed: {e}")
+            errors[location] = e
+
+    deduplicator = JobDeduplicator()
+    depth = max((len(jobs) for jobs in results.values()), default=0)
+    for position in range(depth):
+        for location, jobs in results.items():
+            if position < len(jobs):
+                deduplicator.add(dict(jobs[position], search_location=location))
+
+    if deduplicator.duplicates:
+        logger.info(f"Merged {deduplicator.duplicates} postings found in several locations")
+    return deduplicator.jobs, errors
@@ -3,18 +3,29 @@ Orchestrator Agent
 Central coordinator for job, course, and project agents.
 Uses AWS Bedrock AgentCore with Strands framework and Amazon Nova Premier
 for advanced multi-agent orchestration.
+
+Requests with "stream": true are answered as server-sent events: model
+tokens, tool progress and each career plan section as soon as it is ready.
 """
 
 from bedrock_agentcore import BedrockAgentCoreApp
 from strands import Agent, tool
 from strands.models import BedrockModel
-import json
+import asyncio
 import logging
 import os
-import urllib.request
-import urllib.parse
-from typing import Dict, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple
 from dotenv import load_dotenv
+from agent_client import AgentCallError, get_agent_client, response_text
+from catalog_service import CatalogServiceClient, create_local_catalog
+from job_search import STALE_RESULTS_NOTE, JobSearchCache, search_google_jobs
+from rate_limiter import UpstreamUnavailable
+from fast_path import FastPathRouter, render_courses, render_jobs, render_projects, rows
+from query_router import KNOWN_COUNTRIES, QueryEntities, extract_entities
+from tool_compaction import compact_result, token_budget
 
 # Load environment variables from .env file
 load_dotenv()
@@ -30,11 +41,23 @@ logger = logging.getLogger(__name__)
 AWS_REGION = os.getenv("AWS_DEFAULT_REGION", "us-east-1")
 SERPAPI_KEY = os.getenv("SERPAPI_KEY")
 NEBULA_API_KEY = os.getenv("NEBULA_API_KEY")
+NEBULA_BASE_URL = os.getenv("NEBULA_BASE_URL", "https://api.utdnebula.com")
+CATALOG_TTL_SECONDS = int(os.getenv("CATALOG_TTL_SECONDS", "3600"))
+CATALOG_SERVICE_URL = os.getenv("CATALOG_SERVICE_URL", "")
+JOB_CACHE_TTL_SECONDS = int(os.getenv("JOB_CACHE_TTL_SECONDS", "21600"))
+JOB_CACHE_MAX_ENTRIES = int(os.getenv("JOB_CACHE_MAX_ENTRIES", "256"))
+JOB_CACHE_DB_PATH = os.getenv("JOB_CACHE_DB_PATH", "")
+JOB_CACHE_STALE_SECONDS = int(os.getenv("JOB_CACHE_STALE_SECONDS", "86400"))
+PLAN_BRANCH_TIMEOUT_SECONDS = float(os.getenv("PLAN_BRANCH_TIMEOUT_SECONDS", "25"))
+MAX_PLAN_WORKERS = 6  # Two plans' worth, so branches that outlive their timeout do not block the next plan
 
 # Agent endpoints (configure these based on deployment)
 JOB_AGENT_URL = os.getenv("JOB_AGENT_URL", "http://localhost:8081/invocations")
 COURSE_AGENT_URL = os.getenv("COURSE_AGENT_URL", "http://localhost:8082/invocations")
 PROJECT_AGENT_URL = os.getenv("PROJECT_AGENT_URL", "http://localhost:8083/invocations")
+# "inline" answers sub-queries in this process; "remote" calls the deployed agents and
+# falls back to the inline implementation when an agent is unavailable
+AGENT_DISPATCH_MODE = os.getenv("AGENT_DISPATCH_MODE", "inline").strip().lower()
 
 # Validate required environment variables
 if not SERPAPI_KEY:
@@ -45,43 +68,80 @@ if not NEBULA_API_KEY:
 # Initialize BedrockAgentCore app
 app = BedrockAgentCoreApp()
 
+# Course catalog: the shared catalog service when configured, else an in-process cache
+catalog_cache, _ = create_local_catalog(NEBULA_BASE_URL, NEBULA_API_KEY, ttl=CATALOG_TTL_SECONDS)
+catalog_backend = CatalogServiceClient(CATALOG_SERVICE_URL, catalog_cache) if CATALOG_SERVICE_URL else catalog_cache
+
+# Job search results cache (in-memory LRU, optionally backed by SQLite)
+job_cache = JobSearchCache(
+    max_entries=JOB_CACHE_MAX_ENTRIES,
+    ttl=JOB_CACHE_TTL_SECONDS,
+    db_path=JOB_CACHE_DB_PATH,
+    stale_ttl=JOB_CACHE_STALE_SECONDS
+)
+
+# Runs the job, course and project lookups of build_career_plan concurrently
+_plan_pool = ThreadPoolExecutor(max_workers=MAX_PLAN_WORKERS, thread_name_prefix="career-plan")
+# Monotonic deadline of the build_career_plan lookup running in this thread, if any
+_plan_deadline: ContextVar[Optional[float]] = ContextVar("plan_deadline", default=None)
+
 
-def call_agent(agent_url: str, query: str, timeout: int = 60) -> Dict:
+def call_agent(agent_url: str, query: str, timeout: Optional[float] = None) -> Dict:
     """
     Call another agent's endpoint and return the response.
 
+    Requests go through the endpoint's pooled client (agent_client.py), which
+    limits concurrent requests per agent, hedges slow ones, and answers with
+    the previous response to the same query while the agent is failing.
+
     Args:
         agent_url: The URL of the agent endpoint
         query: The user query to send to the agent
-        timeout: Request timeout in seconds
+        timeout: Request timeout in seconds (default: AGENT_TIMEOUT_SECONDS)
 
     Returns:
         Dictionary with agent response
     """
     try:
         logger.info(f"Calling agent at {agent_url} with query: {query[:100]}...")
+        result = get_agent_client(agent_url).call(query, timeout=timeout)
+        logger.info(f"Agent response received (length: {len(str(result))})")
+        return result
 
-        payload = json.dumps({"inputText": query}).encode('utf-8')
-        headers = {'Content-Type': 'application/json'}
+    except AgentCallError as e:
+        logger.error(f"Error calling agent at {agent_url}: {e}")
+        return {"error": str(e)}
 
-        req = urllib.request.Request(agent_url, data=payload, headers=headers, method='POST')
 
-        with urllib.request.urlopen(req, timeout=timeout) as response:
-            data = response.read().decode('utf-8')
-            result = json.loads(data)
+def dispatch_remote(tool_name: str, agent_url: str, query: str) -> Optional[Dict]:
+    """
+    Answer a sub-query with a deployed agent when AGENT_DISPATCH_MODE is "remote".
 
-            logger.info(f"Agent response received (length: {len(str(result))})")
-            return result
+    Inside build_career_plan the call is bounded by the plan's deadline, and
+    once the deadline has passed the inline fallback is skipped, so no worker
+    or agent slot is held for a section the plan has given up on.
 
-    except urllib.error.HTTPError as e:
-        logger.error(f"HTTP Error calling agent at {agent_url}: {e.code} - {e.reason}")
-        return {"error": f"HTTP {e.code}: {e.reason}"}
-    except urllib.error.URLError as e:
-        logger.error(f"URL Error calling agent at {agent_url}: {e.reason}")
-        return {"error": f"Network error: {str(e.reason)}"}
-    except Exception as e:
-        logger.error(f"Error calling agent at {agent_url}: {e}", exc_info=True)
-        return {"error": f"Failed to call agent: {str(e)}"}
+    Returns:
+        The agent's answer, an error if the plan's deadline passed, or None
+        to use the inline implementation
+    """
+    if AGENT_DISPATCH_MODE != "remote":
+        return None
+    deadline = _plan_deadline.get()
+    timeout = None if deadline is None else deadline - time.monotonic()
+    if timeout is not None and timeout <= 0:
+        return {"error": "The career plan's time limit was reached before this lookup started"}
+
+    result = call_agent(agent_url, query, timeout=timeout)
+    if "error" in result:
+        if deadline is not None and time.monotonic() >= deadline:
+            return {"error": f"Remote agent did not answer in time: {result['error']}"}
+        logger.warning(f"{tool_name}: remote agent unavailable ({result['error']}), answering inline")
+        return None
+    answer = {"source": agent_url, "response": response_text(result)}
+    if result.get("stale"):
+        answer["note"] = "The agent is currently unavailable; this is its previous answer to the same request."
+    return compact_result(tool_name, answer)
 
 
 @tool
@@ -95,52 +155,25 @@ def query_job_agent(job_query: str) -> Dict:
     Returns:
         Job search results from SerpAPI with job listings
     """
+    remote = dispatch_remote("query_job_agent", JOB_AGENT_URL, job_query)
+    if remote is not None:
+        return remote
+
     try:
         logger.info(f"Querying job agent: {job_query}")
 
-        # For local testing, use inline implementation
-        # In production, this would call the deployed job agent
-
-        # Extract job parameters from query
-        job_title = "software engineer"
-        location = "New York"
-        country = "USA"
-
-        # Parse query for job details
-        query_lower = job_query.lower()
-        if "data scientist" in query_lower:
-            job_title = "data scientist"
-        elif "machine learning" in query_lower or "ml engineer" in query_lower:
-            job_title = "machine learning engineer"
-        elif "devops" in query_lower:
-            job_title = "devops engineer"
-        elif "frontend" in query_lower:
-            job_title = "frontend developer"
-        elif "backend" in query_lower:
-            job_title = "backend developer"
-        elif "full-stack" in query_lower or "full stack" in query_lower:
-            job_title = "full stack developer"
-
-        # Parse location
-        if " in " in query_lower:
-            parts = query_lower.split(" in ")
-            if len(parts) > 1:
-                loc_part = parts[1].strip()
-                # Remove common words
-                loc_part = loc_part.replace(" area", "").replace(" jobs", "")
-                if "," in loc_part:
-                    location, country = [x.strip() for x in loc_part.split(",", 1)]
-                else:
-                    location = loc_part
-
-        # Call SerpAPI directly
-        query = f"{job_title} in {location}, {country}"
-        url = f"https://serpapi.com/search.json?{urllib.parse.urlencode({'engine': 'google_jobs', 'q': query, 'hl': 'en', 'api_key': SERPAPI_KEY})}"
-
-        with urllib.request.urlopen(url, timeout=15) as response:
-            data = json.loads(response.read().decode("utf-8"))
+        # Extract job parameters from query in one pass over the compiled lexicon
+        entities = extract_entities(job_query)
+        job_title = entities.titles[0] if entities.titles else "software engineer"
+        if entities.remote:
+            # Remote roles are searched country-wide rather than in a default city
+            job_title = f"remote {job_title}"
+            location, country = entities.job_location(default=("United States", "USA"))
+        else:
+            location, country = entities.job_location(default=("New York", "USA"))
 
-        jobs = data.get("jobs_results", [])[:10]  # Limit to 10 jobs
+        # Call SerpAPI (through the shared job search cache)
+        jobs = search_google_jobs(job_title, location, country, SERPAPI_KEY, cache=job_cache, timeout=15, max_results=10)
 
         simplified_jobs = [
             {
@@ -154,13 +187,19 @@ def query_job_agent(job_query: str) -> Dict:
 
         logger.info(f"Found {len(simplified_jobs)} jobs for {job_title}")
 
-        return {
+        result = {
             "job_title": job_title,
             "location": f"{location}, {country}",
             "job_count": len(simplified_jobs),
             "jobs": simplified_jobs
         }
+        if any(j.get("stale") for j in jobs):
+            result["note"] = STALE_RESULTS_NOTE
+        return compact_result("query_job_agent", result)
 
+    except UpstreamUnavailable as e:
+        logger.warning(f"SerpAPI unavailable: {e}")
+        return e.to_dict()
     except Exception as e:
         logger.error(f"Error querying job agent: {e}", exc_info=True)
         return {"error": f"Failed to search jobs: {str(e)}"}
@@ -177,76 +216,49 @@ def query_course_agent(course_query: str) -> Dict:
     Returns:
         Course recommendations from UTD Nebula API
     """
+    remote = dispatch_remote("query_course_agent", COURSE_AGENT_URL, course_query)
+    if remote is not None:
+        return remote
+
     try:
         logger.info(f"Querying course agent: {course_query}")
 
-        # For local testing, use inline implementation
-        # In production, this would call the deployed course agent
-
-        # Determine departments based on query
-        query_lower = course_query.lower()
-        departments = []
-
-        if any(word in query_lower for word in ["computer science", "cs", "software", "programming"]):
-            departments.append("CS")
-        if any(word in query_lower for word in ["data science", "data", "analytics", "ml", "machine learning"]):
-            departments.extend(["CS", "STAT", "MATH"])
-        if "math" in query_lower:
-            departments.append("MATH")
-        if "engineering" in query_lower:
-            departments.extend(["SE", "CS"])
+        # Determine departments based on query, in order of first mention
+        departments = extract_entities(course_query).departments or ["CS"]
 
-        if not departments:
-            departments = ["CS"]
-
-        # Remove duplicates
-        departments = list(set(departments))
-
-        # Fetch courses from Nebula API
+        # Look up each department in the shared, indexed catalog
         all_courses = []
-        for dept in departments[:2]:  # Limit to 2 departments
-            try:
-                endpoint = f"https://api.utdnebula.com/course/all"
-                headers = {"x-api-key": NEBULA_API_KEY}
-                req = urllib.request.Request(endpoint, headers=headers, method="GET")
-
-                with urllib.request.urlopen(req, timeout=15) as response:
-                    data = json.loads(response.read().decode("utf-8"))
-                    courses = data.get("data", [])
-
-                    # Filter by department
-                    dept_courses = [
-                        c for c in courses
-                        if c.get("subject_prefix", "").upper() == dept
-                    ]
-                    all_courses.extend(dept_courses[:10])  # Limit per department
-
-            except Exception as e:
-                logger.error(f"Error fetching courses for {dept}: {e}")
-                continue
+        try:
+            catalog = catalog_backend.get()
+            for dept in departments[:2]:  # Limit to 2 departments
+                all_courses.extend(catalog.courses_for(dept)[:10])  # Limit per department
+        except UpstreamUnavailable as e:
+            logger.warning(f"Nebula unavailable: {e}")
+            return e.to_dict()
+        except Exception as e:
+            logger.error(f"Error fetching courses: {e}")
 
         # Simplify course data
         simplified_courses = []
         seen = set()
         for course in all_courses:
-            key = (course.get("subject_prefix"), course.get("course_number"))
-            if key not in seen:
+            if course.key not in seen:
                 simplified_courses.append({
-                    "code": f"{course.get('subject_prefix', '')} {course.get('course_number', '')}",
-                    "title": course.get("title", ""),
-                    "description": (course.get("description", "") or "")[:200] + "...",
-                    "credit_hours": course.get("credit_hours", ""),
-                    "level": course.get("class_level", "")
+                    "code": f"{course.subject_prefix} {course.course_number}",
+                    "title": course.title,
+                    "description": course.description[:200] + "...",
+                    "credit_hours": course.credit_hours,
+                    "level": course.class_level
                 })
-                seen.add(key)
+                seen.add(course.key)
 
         logger.info(f"Found {len(simplified_courses)} courses")
 
-        return {
+        return compact_result("query_course_agent", {
             "departments": departments,
             "course_count": len(simplified_courses),
             "courses": simplified_courses[:15]  # Limit total
-        }
+        })
 
     except Exception as e:
         logger.error(f"Error querying course agent: {e}", exc_info=True)
@@ -264,10 +276,14 @@ def query_project_agent(project_query: str) -> Dict:
     Returns:
         Project recommendations with skills and timelines
     """
+    remote = dispatch_remote("query_project_agent", PROJECT_AGENT_URL, project_query)
+    if remote is not None:
+        return remote
+
     try:
         logger.info(f"Querying project agent: {project_query}")
 
-        # For local testing, use inline implementation with curated projects
+        # Inline implementation with curated projects
         query_lower = project_query.lower()
 
         # Determine career focus
@@ -352,16 +368,112 @@ def query_project_agent(project_query: str) -> Dict:
 
         logger.info(f"Recommending {len(projects)} projects")
 
-        return {
+        return compact_result("query_project_agent", {
             "project_count": len(projects),
             "projects": projects[:3]  # Limit to 3 projects
-        }
+        })
 
     except Exception as e:
         logger.error(f"Error querying project agent: {e}", exc_info=True)
         return {"error": f"Failed to get project recommendations: {str(e)}"}
 
 
+# Receives progress events for the streaming response being generated, if any
+_progress_listener: ContextVar[Optional[Callable[[Dict], None]]] = ContextVar("progress_listener", default=None)
+
+
+def _emit(event: Dict):
+    """Send a progress event to the streaming response in progress."""
+    listener = _progress_listener.get()
+    if listener is not None:
+        listener(event)
+
+
+def _timed(fn: Callable[[str], Dict], query: str, deadline: float) -> Tuple[Dict, float]:
+    started = time.monotonic()
+    # Pool threads are reused, so the deadline is only set for this lookup
+    token = _plan_deadline.set(deadline)
+    try:
+        return fn(query), time.monotonic() - started
+    finally:
+        _plan_deadline.reset(token)
+
+
+@tool
+def build_career_plan(career_goal: str, location: str = "") -> Dict:
+    """
+    Gather jobs, courses and projects for a career goal in a single call.
+
+    Use this for comprehensive career plans instead of calling query_job_agent,
+    query_course_agent and query_project_agent one after another. The three
+    lookups run concurrently. A lookup that fails or times out is listed in
+    failed_sections and the other sections are still returned.
+
+    Args:
+        career_goal: Target role (e.g., "machine learning engineer")
+        location: Optional city for the job search (e.g., "Austin")
+
+    Returns:
+        Jobs, courses and projects sections, plus failed_sections if any lookup failed
+    """
+    job_query = f"{career_goal} jobs in {location}" if location else f"{career_goal} jobs"
+    branches = {
+        "jobs": (query_job_agent, job_query),
+        "courses": (query_course_agent, f"courses for {career_goal}"),
+        "projects": (query_project_agent, f"projects for {career_goal}"),
+    }
+    logger.info(f"Building career plan for '{career_goal}' with {len(branches)} concurrent lookups")
+
+    started = time.monotonic()
+    deadline = started + PLAN_BRANCH_TIMEOUT_SECONDS
+    pending = {_plan_pool.submit(_timed, fn, query, deadline): name for name, (fn, query) in branches.items()}
+
+    sections = {}
+    failed = {}
+    timings = {}
+    try:
+        # Every branch has the same deadline, counted from the start of the plan
+        for future in as_completed(list(pending), timeout=PLAN_BRANCH_TIMEOUT_SECONDS):
+            name = pending.pop(future)
+            try:
+                section, elapsed = future.result()
+            except Exception as e:
+                logger.error(f"Career plan {name} lookup failed: {e}", exc_info=True)
+                failed[name] = str(e)
+            else:
+                timings[name] = f"{elapsed:.1f}s"
+                if "error" in section:
+                    failed[name] = section["error"]
+                else:
+                    sections[name] = section
+            _emit_section(name, sections.get(name), failed.get(name), started)
+    except FutureTimeoutError:
+        for future, name in pending.items():
+            future.cancel()
+            logger.warning(f"Career plan {name} lookup timed out after {PLAN_BRANCH_TIMEOUT_SECONDS:.0f}s")
+            failed[name] = f"Timed out after {PLAN_BRANCH_TIMEOUT_SECONDS:.0f}s"
+            _emit_section(name, None, failed[name], started)
+
+    plan = {"career_goal": career_goal}
+    plan.update((name, sections[name]) for name in branches if name in sections)
+    logger.info(f"Career plan built in {time.monotonic() - started:.1f}s (branches: {timings}, failed: {list(failed)})")
+    if failed:
+        plan["failed_sections"] = failed
+        plan["note"] = ("Present the sections that are available and tell the user which parts of the plan "
+                        "could not be retrieved.")
+    # Each section was already fitted to the per-tool budget
+    return compact_result("build_career_plan", plan, budget=len(branches) * token_budget())
+
+
+def _emit_section(name: str, section: Optional[Dict], error: Optional[str], started: float):
+    event = {"type": "section", "section": name, "elapsed_seconds": round(time.monotonic() - started, 1)}
+    if error is None:
+        event.update(status="ok", result=section)
+    else:
+        event.update(status="failed", error=error)
+    _emit(event)
+
+
 # Configure the orchestrator agent with Amazon Nova Pro
 # Note: Nova Premier requires inference profile ARN, using Nova Pro for orchestration
 bedrock_model = BedrockModel(
@@ -384,18 +496,20 @@ Your role is to:
 5. Present a unified, structured recommendation
 
 Available agents:
+- **build_career_plan**: Fetches jobs, courses and projects for a career goal concurrently, in one call
 - **query_job_agent**: Finds job opportunities matching career goals
 - **query_course_agent**: Recommends university courses to build skills
 - **query_project_agent**: Suggests portfolio projects to demonstrate abilities
 
 When to call each agent:
+- Call **build_career_plan** when creating a comprehensive career plan (do NOT also call the three agents separately)
 - Call **query_job_agent** when user wants to know about job market, salaries, or job hunting
 - Call **query_course_agent** when user needs education/courses/learning paths
 - Call **query_project_agent** when user wants to build portfolio/demonstrate skills
-- Call **ALL THREE** when creating comprehensive career plan
+- Call two of the individual agents when the user asks for only those two parts
 
 Guidelines:
-1. **For comprehensive career planning**: Call all three agents
+1. **For comprehensive career planning**: Call build_career_plan once; if it lists failed_sections, present the rest and mention what is missing
 2. **Extract clear goals**: Identify the target role from user query
 3. **Form specific queries**: Make clear, focused queries to each agent
 4. **Synthesize results**: Combine outputs into cohesive career plan
@@ -405,10 +519,8 @@ Guidelines:
 Example orchestration:
 User: "I want to become a machine learning engineer"
 Actions:
-1. Call query_project_agent("projects for machine learning engineer career")
-2. Call query_course_agent("courses for machine learning and data science")
-3. Call query_job_agent("machine learning engineer jobs")
-4. Synthesize into career roadmap
+1. Call build_career_plan("machine learning engineer")
+2. Synthesize the jobs, courses and projects sections into a career roadmap
 
 Present final output with:
 - Executive Summary
@@ -418,8 +530,181 @@ Present final output with:
 - Next Steps Timeline
 
 Be strategic, comprehensive, and actionable. Your goal is to provide a complete career development plan.""",
-    tools=[query_job_agent, query_course_agent, query_project_agent]
+    tools=[build_career_plan, query_job_agent, query_course_agent, query_project_agent]
+)
+
+
+def fast_job_search(query: str, entities: QueryEntities) -> Optional[str]:
+    """Answer "<title> jobs [in <location>]" with the job agent alone."""
+    # Seniority words ("senior", "grad") refine the search beyond a plain title
+    if len(entities.titles) != 1 or entities.levels or len(entities.locations) > 1 or len(entities.countries) > 1:
+        return None
+    if entities.job_location()[1] not in KNOWN_COUNTRIES:
+        return None
+    result = query_job_agent(query)
+    if "error" in result:
+        return None
+    if "response" in result:
+        return result["response"]
+    return render_jobs(
+        f"Here are {result['job_title']} openings in {result['location']}:",
+        rows(result, "jobs"),
+        result.get("job_count")
+    )
+
+
+def fast_department_courses(query: str, entities: QueryEntities) -> Optional[str]:
+    """Answer "<department> courses" with the course agent alone."""
+    if len(entities.departments) != 1 or entities.levels or entities.titles or entities.locations:
+        return None
+    result = query_course_agent(query)
+    if "error" in result:
+        return None
+    if "response" in result:
+        return result["response"]
+    # Catalog fetch errors are logged and swallowed, leaving no courses; let the agent answer
+    if not result.get("course_count"):
+        return None
+    return render_courses(f"{', '.join(result['departments'])} courses at UTD:", rows(result, "courses"))
+
+
+def fast_role_projects(query: str, entities: QueryEntities) -> Optional[str]:
+    """Answer "projects for <title>" with the project agent alone."""
+    if len(entities.titles) != 1:
+        return None
+    result = query_project_agent(query)
+    if "error" in result:
+        return None
+    if "response" in result:
+        return result["response"]
+    return render_projects(f"Portfolio projects for a {entities.titles[0]}:", rows(result, "projects"))
+
+
+fast_path = FastPathRouter("orchestrator")
+fast_path.add(
+    "job_search",
+    triggers=("job", "jobs", "openings", "positions", "roles", "listings", "vacancies"),
+    handler=fast_job_search,
+    words=("open", "current", "latest", "new", "hiring", "available")
+)
+fast_path.add(
+    "department_courses",
+    triggers=("course", "courses", "class", "classes"),
+    handler=fast_department_courses,
+    words=("offered", "available", "catalog", "utd", "department")
 )
+fast_path.add(
+    "role_projects",
+    triggers=("project", "projects"),
+    handler=fast_role_projects,
+    words=("ideas", "portfolio", "build", "should", "make", "good", "best")
+)
+
+
+def _result_text(result) -> str:
+    """Extract the response text from a Strands agent result."""
+    if hasattr(result, 'message'):
+        if isinstance(result.message, dict):
+            content = result.message.get('content', [])
+            if content and isinstance(content, list):
+                return content[0].get('text', str(result.message))
+        return str(result.message)
+    return str(result)
+
+
+async def stream_orchestration(user_input: str) -> AsyncIterator[Dict]:
+    """
+    Run an orchestration request and yield its progress as events.
+
+    Events (the "type" field):
+        token: {"text"} chunk of the model's answer
+        tool_progress: {"tool", "status": "started" | "completed" | "failed", "elapsed_seconds"}
+        section: {"section": "jobs" | "courses" | "projects", "status": "ok" | "failed",
+            "result" or "error", "elapsed_seconds"} as each career plan lookup finishes
+        done: {"response", "elapsed_seconds"} the complete answer
+        error: {"response"} if the request failed
+
+    Args:
+        user_input: User query
+
+    Yields:
+        Event dictionaries, sent to the client as server-sent events
+    """
+    started = time.monotonic()
+
+    # Simple, unambiguous requests are answered without the model
+    fast_response = await asyncio.to_thread(fast_path.route, user_input)
+    if fast_response is not None:
+        yield {"type": "done", "response": fast_response, "elapsed_seconds": round(time.monotonic() - started, 2)}
+        return
+
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def run_agent():
+        try:
+            async for event in agent.stream_async(user_input):
+                events.put_nowait(("agent", event))
+        except Exception as e:
+            events.put_nowait(("failed", e))
+        finally:
+            events.put_nowait(None)
+
+    # Tools run in worker threads and inherit the listener through the task's context
+    token = _progress_listener.set(lambda event: loop.call_soon_threadsafe(events.put_nowait, ("progress", event)))
+    task = asyncio.create_task(run_agent())
+    _progress_listener.reset(token)
+
+    tool_calls: Dict[str, Tuple[str, float]] = {}
+    first_token = None
+    try:
+        while True:
+            item = await events.get()
+            if item is None:
+                break
+            kind, event = item
+
+            if kind == "progress":
+                yield event
+            elif kind == "failed":
+                logger.error(f"Error in streaming orchestrator: {event}", exc_info=event)
+                yield {
+                    "type": "error",
+                    "response": f"I apologize, but I encountered an error creating your career plan: {str(event)}. Please try again with a more specific goal."
+                }
+            elif "data" in event:
+                if first_token is None:
+                    first_token = time.monotonic() - started
+                yield {"type": "token", "text": event["data"]}
+            elif "current_tool_use" in event:
+                tool_use = event["current_tool_use"]
+                tool_id = tool_use.get("toolUseId")
+                # Repeated for every chunk of the tool input; report each call once
+                if tool_id and tool_id not in tool_calls:
+                    tool_calls[tool_id] = (tool_use.get("name", ""), time.monotonic())
+                    yield {"type": "tool_progress", "tool": tool_use.get("name", ""), "status": "started"}
+            elif "message" in event:
+                for block in event["message"].get("content", []):
+                    tool_result = block.get("toolResult") if isinstance(block, dict) else None
+                    if tool_result and tool_result.get("toolUseId") in tool_calls:
+                        name, tool_started = tool_calls[tool_result["toolUseId"]]
+                        yield {
+                            "type": "tool_progress",
+                            "tool": name,
+                            "status": "completed" if tool_result.get("status") == "success" else "failed",
+                            "elapsed_seconds": round(time.monotonic() - tool_started, 1)
+                        }
+            elif "result" in event:
+                elapsed = time.monotonic() - started
+                logger.info(
+                    f"Streaming orchestration completed in {elapsed:.1f}s "
+                    f"(first token after {first_token or elapsed:.1f}s, {len(tool_calls)} tool calls)"
+                )
+                yield {"type": "done", "response": _result_text(event["result"]), "elapsed_seconds": round(elapsed, 2)}
+    finally:
+        # Stop generating if the client disconnected
+        if not task.done():
+            task.cancel()
 
 
 @app.entrypoint
@@ -427,6 +712,7 @@ def invoke_agentcore(payload):
     """
     AgentCore entrypoint for orchestrator.
     Coordinates multiple agents to create comprehensive career plans.
+    With "stream": true in the payload, returns an event stream (see stream_orchestration).
     """
     try:
         # Extract user input
@@ -437,21 +723,21 @@ def invoke_agentcore(payload):
 
         logger.info(f"Processing orchestration request: {user_input}")
 
+        if payload.get("stream"):
+            return stream_orchestration(user_input)
+
+        # Simple, unambiguous requests are answered without the model
+        fast_response = fast_path.route(user_input)
+        if fast_response is not None:
+            return {
+                "response": fast_response
+            }
+
         # Invoke the orchestrator agent
         result = agent(user_input)
 
         # Extract text from Strands response
-        if hasattr(result, 'message'):
-            if isinstance(result.message, dict):
-                content = result.message.get('content', [])
-                if content and isinstance(content, list):
-                    response_text = content[0].get('text', str(result.message))
-                else:
-                    response_text = str(result.message)
-            else:
-                response_text = str(result.message)
-        else:
-            response_text = str(result)
+        response_text = _result_text(result)
 
         logger.info(f"Orchestration completed successfully")
         logger.debug(f"Response preview: {response_text[:300]}...")
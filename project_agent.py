@@ -10,7 +10,10 @@ from strands.models import BedrockModel
 import json
 import logging
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional
+from fast_path import FastPathRouter, render_projects, rows
+from query_router import QueryEntities
+from tool_compaction import compact_result
 
 # Initialize logging
 logging.basicConfig(
@@ -290,12 +293,12 @@ def get_project_recommendations(career_goal: str, experience_level: str = "inter
 
         logger.info(f"Recommending {len(recommended_projects)} projects")
 
-        return {
+        return compact_result("get_project_recommendations", {
             "career_goal": career_goal,
             "experience_level": experience_level,
             "project_count": len(recommended_projects),
             "projects": recommended_projects
-        }
+        })
 
     except Exception as e:
         logger.error(f"Error in get_project_recommendations: {e}", exc_info=True)
@@ -352,11 +355,11 @@ def get_skill_recommendations(career_goal: str, skill_categories: List[str] = No
 
         logger.info(f"Recommending skills from {len(recommended_skills)} categories")
 
-        return {
+        return compact_result("get_skill_recommendations", {
             "career_goal": career_goal,
             "skill_categories": list(recommended_skills.keys()),
             "skills": recommended_skills
-        }
+        })
 
     except Exception as e:
         logger.error(f"Error in get_skill_recommendations: {e}", exc_info=True)
@@ -406,6 +409,30 @@ Remember: Quality over quantity. 3 well-executed projects are better than 10 med
 )
 
 
+EXPERIENCE_LEVELS = ("beginner", "intermediate", "advanced")
+
+
+def fast_role_projects(query: str, entities: QueryEntities) -> Optional[str]:
+    """Answer "[<experience level>] projects for <title>" with a direct lookup."""
+    levels = [word for word in entities.residual if word in EXPERIENCE_LEVELS]
+    if len(entities.titles) != 1 or len(levels) > 1:
+        return None
+    level = levels[0] if levels else "intermediate"
+    result = get_project_recommendations(entities.titles[0], level)
+    if "error" in result:
+        return None
+    return render_projects(f"Portfolio projects for a {entities.titles[0]} ({level} level):", rows(result, "projects"))
+
+
+fast_path = FastPathRouter("project_agent")
+fast_path.add(
+    "role_projects",
+    triggers=("project", "projects"),
+    handler=fast_role_projects,
+    words=EXPERIENCE_LEVELS + ("ideas", "portfolio", "build", "should", "make", "good", "best", "level", "become")
+)
+
+
 @app.entrypoint
 def invoke_agentcore(payload):
     """
@@ -421,6 +448,13 @@ def invoke_agentcore(payload):
 
         logger.info(f"Processing project recommendation request: {user_input}")
 
+        # Simple, unambiguous requests are answered without the model
+        fast_response = fast_path.route(user_input)
+        if fast_response is not None:
+            return {
+                "response": fast_response
+            }
+
         # Invoke the Strands agent
         result = agent(user_input)
 
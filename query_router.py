@@ -0,0 +1,295 @@
+"""
+Query Router
+Extracts job titles, departments, course levels, locations and countries from
+a user query in one pass. The lexicon is compiled at import time into an Aho-Corasick
+automaton over word tokens, so phrases only match on whole words ("cs" does
+not match inside "physics") and every entity is found in a single scan of
+the query. Overlapping matches resolve to the leftmost, longest phrase, so
+"machine learning engineer" wins over "machine learning" (such titles list
+the departments of the phrases they cover themselves). Two-letter city
+aliases ("la", "sf", "dc") only count at the end of the query, so "la jolla"
+is not Los Angeles.
+"""
+
+import logging
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Entity kinds
+TITLE = "title"
+DEPARTMENT = "department"
+LEVEL = "level"
+LOCATION = "location"
+COUNTRY = "country"
+REMOTE = "remote"
+
+DATA_DEPARTMENTS = ("CS", "STAT", "MATH")
+
+# phrase -> entities it denotes; one phrase may denote several
+LEXICON: Dict[str, List[Tuple[str, object]]] = {}
+
+
+def _add(kind: str, value, *phrases: str):
+    for phrase in phrases:
+        LEXICON.setdefault(phrase, []).append((kind, value))
+
+
+# Job titles
+_add(TITLE, "software engineer", "software engineer", "software engineers", "software developer", "swe", "programmer")
+_add(TITLE, "data scientist", "data scientist", "data scientists", "data science")
+_add(TITLE, "data analyst", "data analyst", "data analysts", "business analyst")
+_add(TITLE, "machine learning engineer", "machine learning", "machine learning engineer", "ml", "ml engineer",
+     "ai engineer", "deep learning")
+_add(TITLE, "devops engineer", "devops", "dev ops", "devops engineer", "site reliability", "sre")
+_add(TITLE, "frontend developer", "frontend", "front end", "frontend developer", "front end developer")
+_add(TITLE, "backend developer", "backend", "back end", "backend developer", "back end developer")
+_add(TITLE, "full stack developer", "full stack", "fullstack", "full stack developer", "full stack engineer")
+_add(TITLE, "cloud engineer", "cloud engineer", "cloud architect")
+_add(TITLE, "cybersecurity analyst", "cybersecurity", "cyber security", "security analyst", "security engineer")
+_add(TITLE, "product manager", "product manager", "product management")
+
+# University departments
+_add(DEPARTMENT, ("CS",), "computer science", "cs", "software", "programming", "coding")
+_add(DEPARTMENT, DATA_DEPARTMENTS, "data science", "data", "analytics", "ml", "machine learning", "deep learning")
+# Titles that win over the department phrases inside them ("machine learning engineer")
+_add(DEPARTMENT, DATA_DEPARTMENTS, "data scientist", "data scientists", "data analyst", "data analysts",
+     "machine learning engineer", "ml engineer")
+_add(DEPARTMENT, ("MATH",), "math", "maths", "mathematics")
+_add(DEPARTMENT, ("STAT",), "statistics", "stats")
+_add(DEPARTMENT, ("SE", "CS"), "engineering", "software engineering", "software engineer", "software engineers")
+_add(DEPARTMENT, ("EE",), "electrical engineering", "electrical engineer")
+_add(DEPARTMENT, ("PHYS",), "physics")
+_add(DEPARTMENT, ("CS",), "cybersecurity", "cyber security")
+
+# Course levels, as named in the catalog
+_add(LEVEL, "Lower Division", "lower division", "lower level", "freshman", "sophomore")
+_add(LEVEL, "Upper Division", "upper division", "upper level", "junior", "senior")
+_add(LEVEL, "Graduate", "graduate", "grad", "masters", "phd")
+
+# Locations as (city, country)
+for _city, _aliases in {
+    "New York": ("new york", "new york city", "nyc", "manhattan"),
+    "San Francisco": ("san francisco", "sf", "bay area"),
+    "Seattle": ("seattle",),
+    "Austin": ("austin",),
+    "Dallas": ("dallas",),
+    "Houston": ("houston",),
+    "Boston": ("boston",),
+    "Chicago": ("chicago",),
+    "Los Angeles": ("los angeles", "la"),
+    "San Jose": ("san jose", "silicon valley"),
+    "San Diego": ("san diego",),
+    "Denver": ("denver",),
+    "Atlanta": ("atlanta",),
+    "Washington DC": ("washington dc", "dc"),
+    "Miami": ("miami",),
+    "Phoenix": ("phoenix",),
+    "Portland": ("portland",),
+    "Raleigh": ("raleigh",),
+    "Pittsburgh": ("pittsburgh",),
+    "Philadelphia": ("philadelphia",),
+    "Minneapolis": ("minneapolis",),
+    "Salt Lake City": ("salt lake city",),
+    "Richardson": ("richardson",),
+    "Plano": ("plano",),
+}.items():
+    _add(LOCATION, (_city, "USA"), *_aliases)
+for _city, _country, _aliases in (
+    ("Toronto", "Canada", ("toronto",)),
+    ("Vancouver", "Canada", ("vancouver",)),
+    ("London", "UK", ("london",)),
+    ("Bangalore", "India", ("bangalore", "bengaluru")),
+    ("Berlin", "Germany", ("berlin",)),
+):
+    _add(LOCATION, (_city, _country), *_aliases)
+
+# Short aliases that are too often the start of another name ("la jolla") to trust mid-query
+END_ONLY_PHRASES = frozenset(
+    phrase for phrase, entities in LEXICON.items()
+    if len(phrase) <= 2 and all(kind == LOCATION for kind, _ in entities)
+)
+
+# Remote work is a qualifier of the search, not a place
+_add(REMOTE, True, "remote", "anywhere", "work from home", "wfh")
+
+# Countries
+_add(COUNTRY, "USA", "usa", "united states", "america")  # not "us", which is usually the pronoun
+_add(COUNTRY, "Canada", "canada")
+_add(COUNTRY, "UK", "uk", "united kingdom", "england")
+_add(COUNTRY, "India", "india")
+_add(COUNTRY, "Germany", "germany")
+
+KNOWN_COUNTRIES = frozenset(value for entities in LEXICON.values() for kind, value in entities if kind == COUNTRY)
+
+# Fallback for locations missing from the lexicon: "in <place>[, <country>]"
+LOCATION_FALLBACK_PATTERN = re.compile(
+    r"\bin\s+(?P<location>[a-z][a-z .'-]*?)(?:\s*,\s*(?P<country>[a-z][a-z .]*?))?"
+    r"(?=\s+(?:area|jobs?|positions?|roles?|openings?)\b|[?.!;]|$)"
+)
+
+
+class _Node:
+    __slots__ = ("children", "fail", "outputs")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.fail: Optional["_Node"] = None
+        self.outputs: List[Tuple[int, List[Tuple[str, object]]]] = []
+
+
+class EntityMatcher:
+    """Aho-Corasick automaton over word tokens of a phrase lexicon."""
+
+    def __init__(self, lexicon: Dict[str, List[Tuple[str, object]]]):
+        self._root = _Node()
+        for phrase, entities in lexicon.items():
+            tokens = TOKEN_PATTERN.findall(phrase.lower())
+            node = self._root
+            for token in tokens:
+                node = node.children.setdefault(token, _Node())
+            node.outputs.append((len(tokens), entities))
+
+        # Breadth-first construction of failure links
+        self._root.fail = self._root
+        queue = deque()
+        for child in self._root.children.values():
+            child.fail = self._root
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for token, child in node.children.items():
+                fail = node.fail
+                while fail is not self._root and token not in fail.children:
+                    fail = fail.fail
+                child.fail = fail.children.get(token, self._root)
+                if child.fail is child:
+                    child.fail = self._root
+                child.outputs = child.outputs + child.fail.outputs
+                queue.append(child)
+
+    def matches(self, tokens: List[str]) -> List[Tuple[int, int, List[Tuple[str, object]]]]:
+        """
+        Find lexicon phrases in a token sequence.
+
+        Returns:
+            Non-overlapping (start, end, entities) token spans, leftmost-longest
+            first, in query order
+        """
+        found = []
+        node = self._root
+        for position, token in enumerate(tokens):
+            while node is not self._root and token not in node.children:
+                node = node.fail
+            node = node.children.get(token, self._root)
+            for length, entities in node.outputs:
+                found.append((position - length + 1, position + 1, entities))
+
+        found.sort(key=lambda match: (match[0], match[0] - match[1]))
+        selected = []
+        covered = 0
+        for start, end, entities in found:
+            if start >= covered:
+                selected.append((start, end, entities))
+                covered = end
+        return selected
+
+
+class QueryEntities:
+    """
+    Entities found in a query, each list in order of first appearance.
+
+    `residual` holds the query words that are not part of any entity. Remote
+    work phrases set `remote` but stay in the residual, since no templated
+    answer accounts for them.
+    """
+
+    __slots__ = ("titles", "departments", "levels", "locations", "countries", "remote", "residual")
+
+    def __init__(self):
+        self.titles: List[str] = []
+        self.departments: List[str] = []
+        self.levels: List[str] = []
+        self.locations: List[Tuple[str, str]] = []
+        self.countries: List[str] = []
+        self.remote = False
+        self.residual: List[str] = []
+
+    def job_location(self, default: Tuple[str, str] = ("New York", "USA")) -> Tuple[str, str]:
+        """Return the first (location, country), preferring an explicitly named country."""
+        location, country = self.locations[0] if self.locations else default
+        return location, self.countries[0] if self.countries else (country or default[1])
+
+    def __repr__(self):
+        return (
+            f"QueryEntities(titles={self.titles}, departments={self.departments}, levels={self.levels}, "
+            f"locations={self.locations}, countries={self.countries}, remote={self.remote}, "
+            f"residual={self.residual})"
+        )
+
+
+def _append_unique(values: List, new_values: Iterable):
+    for value in new_values:
+        if value not in values:
+            values.append(value)
+
+
+_matcher = EntityMatcher(LEXICON)
+
+
+def extract_entities(query: str) -> QueryEntities:
+    """
+    Extract job titles, departments, locations and countries from a query.
+
+    Args:
+        query: Natural language user query
+
+    Returns:
+        QueryEntities with every entity found in the query
+    """
+    text = (query or "").lower()
+    spans = [(match.start(), match.end()) for match in TOKEN_PATTERN.finditer(text)]
+    tokens = [text[start:end] for start, end in spans]
+
+    entities = QueryEntities()
+    matched_chars = []
+    for start, end, found in _matcher.matches(tokens):
+        if end < len(tokens) and " ".join(tokens[start:end]) in END_ONLY_PHRASES:
+            continue
+        if any(kind == REMOTE for kind, _ in found):
+            entities.remote = True
+            continue
+        matched_chars.append((spans[start][0], spans[end - 1][1]))
+        for kind, value in found:
+            if kind == TITLE:
+                _append_unique(entities.titles, [value])
+            elif kind == DEPARTMENT:
+                _append_unique(entities.departments, value)
+            elif kind == LEVEL:
+                _append_unique(entities.levels, [value])
+            elif kind == LOCATION:
+                _append_unique(entities.locations, [value])
+            elif kind == COUNTRY:
+                _append_unique(entities.countries, [value])
+
+    if not entities.locations:
+        fallback = LOCATION_FALLBACK_PATTERN.search(text)
+        # Ignore "in data science" and the like: the phrase must not be a known entity
+        if fallback and not any(
+            start < fallback.end("location") and fallback.start("location") < end for start, end in matched_chars
+        ):
+            location = fallback.group("location").strip().title()
+            country = (fallback.group("country") or "").strip()
+            entities.locations.append((location, country.upper() if len(country) <= 3 else country.title()))
+            matched_chars.append((fallback.start("location"), fallback.end()))
+
+    entities.residual = [
+        token for token, (start, end) in zip(tokens, spans)
+        if not any(match_start <= start and end <= match_end for match_start, match_end in matched_chars)
+    ]
+    logger.debug(f"Extracted {entities} from {query!r}")
+    return entities
@@ -0,0 +1,277 @@
+"""
+Rate Limiter
+Client-side rate limiting and quota accounting for upstream APIs (SerpAPI,
+Nebula). Each upstream gets a token bucket that paces outgoing requests.
+429 and 5xx responses shrink the allowed rate and block the upstream for a
+jittered backoff (or the server's Retry-After). Retries are drawn from a
+budget that only grows with successful requests, so failures cannot turn
+into retry storms. A quota ledger records per-upstream usage for metrics.
+
+When a request cannot be made in time it fails fast with UpstreamUnavailable,
+whose to_dict() is a structured tool result that tells the model not to
+retry.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+import urllib.error
+from typing import Callable, Dict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Configuration
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+MAX_WAIT_SECONDS = 5.0  # Longest a request waits for a token or backoff before failing fast
+MAX_RETRIES = 2
+BASE_BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 30.0
+MIN_RATE_FRACTION = 0.1  # Adaptive backoff never drops below this share of the configured rate
+RATE_RECOVERY_FRACTION = 0.1  # Share of the configured rate regained per success
+RETRY_BUDGET_INITIAL = 3.0
+RETRY_BUDGET_RATIO = 0.2  # Retry credits earned per successful request
+RETRY_BUDGET_MAX = 10.0
+DEFAULT_QUOTA_WINDOW_SECONDS = 86400
+
+# Per-upstream defaults, overridable with <NAME>_RATE_LIMIT, <NAME>_BURST and <NAME>_DAILY_QUOTA
+UPSTREAM_DEFAULTS = {
+    "serpapi": {"rate": 1.0, "burst": 5, "quota": 0},
+    "nebula": {"rate": 5.0, "burst": 10, "quota": 0},
+}
+
+
+class UpstreamUnavailable(Exception):
+    """
+    Raised when an upstream request is refused locally or keeps failing.
+
+    Attributes:
+        upstream: Upstream name
+        reason: One of "rate_limited", "quota_exhausted", "throttled", "server_error",
+            or "circuit_open" (see circuit_breaker)
+        retry_after: Seconds until the upstream is expected to accept requests again
+    """
+
+    def __init__(self, upstream: str, reason: str, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def to_dict(self) -> Dict:
+        """Structured tool result that tells the model not to retry immediately."""
+        return {
+            "error": str(self),
+            "error_type": self.reason,
+            "upstream": self.upstream,
+            "retryable": False,
+            "retry_after_seconds": round(self.retry_after),
+            "advice": "Do not call this tool again for this request. Answer with the information you already "
+                      "have and tell the user this data source is temporarily unavailable."
+        }
+
+
+class RateLimiter:
+    """
+    Token bucket with adaptive backoff, a retry budget and a quota ledger.
+
+    Thread-safe; one instance is shared by every request to an upstream.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        quota: int = 0,
+        quota_window: float = DEFAULT_QUOTA_WINDOW_SECONDS,
+        max_wait: float = MAX_WAIT_SECONDS,
+        max_retries: int = MAX_RETRIES
+    ):
+        self.name = name
+        self._max_rate = rate
+        self._rate = rate
+        self._burst = burst
+        self._quota = quota
+        self._quota_window = quota_window
+        self._max_wait = max_wait
+        self._max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._failures = 0
+        self._retry_credits = RETRY_BUDGET_INITIAL
+        self._window = 0
+        self._ledger = {
+            "requests": 0,
+            "successes": 0,
+            "throttled": 0,
+            "server_errors": 0,
+            "retries": 0,
+            "rejected": 0,
+            "quota_used": 0,
+        }
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """
+        Run an upstream request under the limiter.
+
+        Args:
+            fn: Sends the request; raises urllib.error.HTTPError on failure
+
+        Returns:
+            The result of `fn`
+
+        Raises:
+            UpstreamUnavailable: If no request slot is available within
+                max_wait, the quota is exhausted, or 429/5xx responses
+                persist after the allowed retries
+            urllib.error.HTTPError: For other HTTP errors, unchanged
+        """
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                result = fn()
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRYABLE_STATUS:
+                    raise
+                delay = self._on_failure(e)
+                reason = "throttled" if e.code == 429 else "server_error"
+                if attempt >= self._max_retries or delay > self._max_wait or not self._spend_retry():
+                    raise UpstreamUnavailable(
+                        self.name, reason,
+                        f"{self.name} returned HTTP {e.code}; backing off for {delay:.0f}s",
+                        retry_after=delay
+                    ) from e
+                attempt += 1
+                logger.info(f"{self.name} returned HTTP {e.code}, retry {attempt} in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+            self._on_success()
+            return result
+
+    def stats(self) -> Dict:
+        """Return the quota ledger and current limiter state."""
+        with self._lock:
+            self._roll_window(time.time())
+            stats = dict(self._ledger)
+            stats["quota_limit"] = self._quota
+            stats["current_rate"] = round(self._rate, 3)
+            stats["retry_credits"] = round(self._retry_credits, 2)
+            stats["blocked_for_seconds"] = round(max(0.0, self._blocked_until - time.monotonic()), 2)
+        return stats
+
+    def _acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._roll_window(time.time())
+            if self._quota and self._ledger["quota_used"] >= self._quota:
+                self._ledger["rejected"] += 1
+                reset_in = (self._window + 1) * self._quota_window - time.time()
+                raise UpstreamUnavailable(
+                    self.name, "quota_exhausted",
+                    f"{self.name} quota of {self._quota} requests is used up",
+                    retry_after=reset_in
+                )
+
+            self._tokens = min(self._burst, self._tokens + (now - self._refilled_at) * self._rate)
+            self._refilled_at = now
+            wait = max(self._blocked_until - now, (1 - self._tokens) / self._rate if self._tokens < 1 else 0.0)
+            if wait > self._max_wait:
+                self._ledger["rejected"] += 1
+                raise UpstreamUnavailable(
+                    self.name, "rate_limited",
+                    f"{self.name} is rate limited; next request slot in {wait:.0f}s",
+                    retry_after=wait
+                )
+
+            # Reserve the token now; callers behind us wait for the next one
+            self._tokens -= 1
+            self._ledger["requests"] += 1
+            self._ledger["quota_used"] += 1
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def _on_failure(self, error: urllib.error.HTTPError) -> float:
+        with self._lock:
+            self._failures += 1
+            self._ledger["throttled" if error.code == 429 else "server_errors"] += 1
+            self._rate = max(self._max_rate * MIN_RATE_FRACTION, self._rate / 2)
+
+            backoff = min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** (self._failures - 1))
+            delay = random.uniform(backoff / 2, backoff)
+            retry_after = _retry_after_seconds(error)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            return delay
+
+    def _on_success(self):
+        with self._lock:
+            self._failures = 0
+            self._ledger["successes"] += 1
+            self._rate = min(self._max_rate, self._rate + self._max_rate * RATE_RECOVERY_FRACTION)
+            self._retry_credits = min(RETRY_BUDGET_MAX, self._retry_credits + RETRY_BUDGET_RATIO)
+
+    def _spend_retry(self) -> bool:
+        with self._lock:
+            if self._retry_credits < 1:
+                return False
+            self._retry_credits -= 1
+            self._ledger["retries"] += 1
+            return True
+
+    def _roll_window(self, now: float):
+        window = int(now // self._quota_window)
+        if window != self._window:
+            self._window = window
+            self._ledger["quota_used"] = 0
+
+
+def _retry_after_seconds(error: urllib.error.HTTPError):
+    value = error.headers.get("Retry-After") if error.headers is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> RateLimiter:
+    """
+    Return the limiter for an upstream, creating it on first use.
+
+    Limits come from <NAME>_RATE_LIMIT (requests per second), <NAME>_BURST
+    and <NAME>_DAILY_QUOTA (0 for no quota), falling back to
+    UPSTREAM_DEFAULTS.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            defaults = UPSTREAM_DEFAULTS.get(name, {"rate": 5.0, "burst": 10, "quota": 0})
+            prefix = name.upper()
+            limiter = _limiters[name] = RateLimiter(
+                name,
+                rate=float(os.getenv(f"{prefix}_RATE_LIMIT", str(defaults["rate"]))),
+                burst=int(os.getenv(f"{prefix}_BURST", str(defaults["burst"]))),
+                quota=int(os.getenv(f"{prefix}_DAILY_QUOTA", str(defaults["quota"])))
+            )
+        return limiter
+
+
+def ledger() -> Dict[str, Dict]:
+    """Return the quota ledger of every upstream used so far."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.stats() for limiter in limiters}
@@ -0,0 +1,302 @@
+"""
+Record / Replay
+Offline stand-in for the paid upstream APIs (SerpAPI, Nebula) so the agents
+can be load tested without spending quota. Selected with UPSTREAM_MODE:
+
+    live    (default) requests go to the real upstreams
+    record  requests go to the real upstreams and every response is saved
+            as a fixture file in UPSTREAM_FIXTURE_DIR
+    replay  requests are sent to the stand-in server at UPSTREAM_REPLAY_URL,
+            which answers from the recorded fixtures
+
+Only requests tagged with an upstream name in http_client are recorded or
+replayed; calls between agents always go to the real endpoints. API keys are
+stripped from fixture keys and are never written to disk.
+
+Run the stand-in server with:
+    python record_replay.py --fixtures fixtures --port 8099 --latency-ms 300 --error-rate 0.02
+"""
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DEFAULT_FIXTURE_DIR = "fixtures"
+DEFAULT_REPLAY_URL = "http://127.0.0.1:8099"
+REPLAY_HOST_HEADER = "X-Replay-Host"
+SECRET_PARAMS = frozenset({"api_key", "apikey", "key", "token"})
+RECORDED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Retry-After")
+
+_write_lock = threading.Lock()
+
+
+def mode() -> str:
+    """Return the configured upstream mode: "live", "record" or "replay"."""
+    return os.getenv("UPSTREAM_MODE", "live").strip().lower() or "live"
+
+
+def request_key(method: str, host: str, path: str, body: Optional[bytes] = None) -> str:
+    """
+    Identify an upstream request independently of its credentials.
+
+    Args:
+        method: HTTP method
+        host: Upstream host name
+        path: Request path including the query string
+        body: Optional request body
+
+    Returns:
+        Hex digest used as the fixture name
+    """
+    parts = urllib.parse.urlsplit(path)
+    query = sorted(
+        (name, value) for name, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in SECRET_PARAMS
+    )
+    digest = hashlib.sha256()
+    for part in (method.upper(), host.lower(), parts.path, urllib.parse.urlencode(query)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(body or b"")
+    return digest.hexdigest()[:32]
+
+
+def _redacted(path: str) -> str:
+    parts = urllib.parse.urlsplit(path)
+    query = [
+        (name, "REDACTED" if name.lower() in SECRET_PARAMS else value)
+        for name, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+    ]
+    return urllib.parse.urlunsplit(("", "", parts.path, urllib.parse.urlencode(query), ""))
+
+
+class RecordedResponse:
+    """In-memory response with the same interface as http_client.PooledResponse."""
+
+    def __init__(self, url: str, status: int, reason: str, headers, body: bytes):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self._body = io.BytesIO(body)
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self._body.read() if amt is None else self._body.read(amt)
+
+    def getheader(self, name: str, default=None):
+        return self.headers.get(name, default)
+
+    def close(self):
+        self._body.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def record(method: str, url: str, data: Optional[bytes], send: Callable):
+    """
+    Send a request and save its response as a fixture.
+
+    Args:
+        method: HTTP method
+        url: Request URL
+        data: Optional request body
+        send: Sends the request and returns a response
+
+    Returns:
+        RecordedResponse with the full body, read before saving
+
+    Raises:
+        urllib.error.HTTPError: Re-raised after recording the error response
+    """
+    parts = urllib.parse.urlsplit(url)
+    path = urllib.parse.urlunsplit(("", "", parts.path, parts.query, ""))
+    try:
+        with send() as response:
+            body = response.read()
+            status, reason, headers = response.status, response.reason, response.headers
+    except urllib.error.HTTPError as e:
+        body = e.read()
+        # Conditional 304s would overwrite the full response; the stand-in answers those itself
+        if e.code != 304:
+            _save(method, parts.hostname, path, data, e.code, e.headers, body)
+        raise urllib.error.HTTPError(url, e.code, e.reason, e.headers, io.BytesIO(body))
+
+    _save(method, parts.hostname, path, data, status, headers, body)
+    return RecordedResponse(url, status, reason, headers, body)
+
+
+def _save(method: str, host: str, path: str, data: Optional[bytes], status: int, headers, body: bytes):
+    fixture_dir = os.getenv("UPSTREAM_FIXTURE_DIR", DEFAULT_FIXTURE_DIR)
+    key = request_key(method, host, path, data)
+    fixture = {
+        "request": {"method": method.upper(), "host": host, "path": _redacted(path)},
+        "status": status,
+        "headers": {name: headers.get(name) for name in RECORDED_HEADERS if headers and headers.get(name)},
+    }
+    try:
+        fixture["body"] = body.decode("utf-8")
+    except UnicodeDecodeError:
+        fixture["body_base64"] = base64.b64encode(body).decode("ascii")
+
+    with _write_lock:
+        os.makedirs(fixture_dir, exist_ok=True)
+        fixture_path = os.path.join(fixture_dir, f"{key}.json")
+        tmp_path = f"{fixture_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(fixture, f)
+        os.replace(tmp_path, fixture_path)
+    logger.info(f"Recorded {method.upper()} {host}{_redacted(path)[:80]} -> {status} ({len(body)} bytes)")
+
+
+def replay_target(url: str, headers: Optional[Dict[str, str]]) -> Tuple[str, Dict[str, str]]:
+    """
+    Rewrite an upstream request to go to the stand-in server.
+
+    Returns:
+        Tuple of (stand-in URL, headers naming the original host)
+    """
+    parts = urllib.parse.urlsplit(url)
+    replay_url = os.getenv("UPSTREAM_REPLAY_URL", DEFAULT_REPLAY_URL).rstrip("/")
+    headers = dict(headers or {})
+    headers[REPLAY_HOST_HEADER] = parts.hostname
+    return f"{replay_url}{urllib.parse.urlunsplit(('', '', parts.path, parts.query, ''))}", headers
+
+
+def load_fixtures(fixture_dir: str) -> Dict[str, Dict]:
+    """Load every fixture in a directory, keyed by request key."""
+    fixtures = {}
+    for name in sorted(os.listdir(fixture_dir)):
+        if name.endswith(".json"):
+            with open(os.path.join(fixture_dir, name), encoding="utf-8") as f:
+                fixtures[name[:-len(".json")]] = json.load(f)
+    return fixtures
+
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+    """Answers upstream requests from recorded fixtures, with injected latency and errors."""
+
+    server_version = "UpstreamReplay/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._replay()
+
+    def do_POST(self):
+        self._replay()
+
+    def _replay(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else None
+        host = self.headers.get(REPLAY_HOST_HEADER, "")
+        fixture = self.server.fixtures.get(request_key(self.command, host, self.path, body))
+
+        options = self.server.options
+        delay = max(0.0, random.gauss(options.latency_ms, options.jitter_ms)) / 1000
+        if delay:
+            time.sleep(delay)
+
+        if random.random() < options.error_rate:
+            self.server.count("injected_errors")
+            self._send(options.error_status, {"Retry-After": "1"}, b'{"error": "Injected upstream error"}')
+        elif fixture is None:
+            self.server.count("misses")
+            logger.warning(f"No fixture for {self.command} {host}{_redacted(self.path)}")
+            self._send(404, {}, json.dumps({"error": f"No recorded response for {host}{_redacted(self.path)}"}).encode())
+        else:
+            self.server.count("hits")
+            headers = dict(fixture.get("headers", {}))
+            etag = headers.get("ETag")
+            if etag and self.headers.get("If-None-Match") == etag:
+                self._send(304, {"ETag": etag}, b"")
+                return
+            if "body_base64" in fixture:
+                payload = base64.b64decode(fixture["body_base64"])
+            else:
+                payload = fixture["body"].encode("utf-8")
+            self._send(fixture["status"], headers, payload)
+
+    def _send(self, status: int, headers: Dict[str, str], body: bytes):
+        self.send_response(status)
+        headers.setdefault("Content-Type", "application/json")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Stand-in upstream server holding the loaded fixtures and replay counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address, fixtures: Dict[str, Dict], options):
+        super().__init__(address, ReplayRequestHandler)
+        self.fixtures = fixtures
+        self.options = options
+        self.stats = {"hits": 0, "misses": 0, "injected_errors": 0}
+        self._stats_lock = threading.Lock()
+
+    def count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="Serve recorded upstream responses for offline load testing")
+    parser.add_argument("--fixtures", default=os.getenv("UPSTREAM_FIXTURE_DIR", DEFAULT_FIXTURE_DIR),
+                        help="Directory of recorded fixtures")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=float(os.getenv("REPLAY_LATENCY_MS", "0")),
+                        help="Mean added latency per response")
+    parser.add_argument("--jitter-ms", type=float, default=float(os.getenv("REPLAY_JITTER_MS", "0")),
+                        help="Standard deviation of the added latency")
+    parser.add_argument("--error-rate", type=float, default=float(os.getenv("REPLAY_ERROR_RATE", "0")),
+                        help="Fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=int(os.getenv("REPLAY_ERROR_STATUS", "503")),
+                        help="Status code of injected errors (e.g. 429 or 503)")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    server = ReplayServer((args.host, args.port), fixtures, args)
+    logger.info(
+        f"Replaying {len(fixtures)} fixtures on {args.host}:{args.port} "
+        f"(latency {args.latency_ms}±{args.jitter_ms}ms, error rate {args.error_rate})"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info(f"Replay stats: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Single Flight
+Coalesces concurrent identical upstream requests. While a call for a key is
+in flight, other callers with the same key wait for it and share its result
+(or its exception) instead of sending their own request.
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, Hashable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Call:
+    """One in-flight call and the outcome shared with its waiters."""
+
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Per-key request coalescing.
+
+    The first caller for a key runs the function; callers arriving before it
+    finishes block until it does and receive the same result or exception.
+    Results are not cached: once the call completes, the next caller for the
+    key starts a new one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats = {"calls": 0, "coalesced": 0, "timeouts": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], T], timeout: Optional[float] = None) -> T:
+        """
+        Run `fn`, or wait for an in-flight call with the same key.
+
+        Args:
+            key: Identifies equivalent requests
+            fn: Performs the request
+            timeout: Maximum seconds to wait for another caller's in-flight
+                call; None waits until it completes
+
+        Returns:
+            The result of `fn`
+
+        Raises:
+            TimeoutError: If the in-flight call did not finish within `timeout`
+            Exception: Whatever `fn` raised, re-raised in every waiting caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self._stats["calls"] += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                leader = False
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            if call.waiters:
+                logger.debug(f"Shared result of {key!r} with {call.waiters} waiting callers")
+        elif not call.done.wait(timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise TimeoutError(f"Timed out after {timeout}s waiting for in-flight request {key!r}")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> Dict:
+        """Return a copy of the call counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
@@ -0,0 +1,24 @@
+import time
+
+import pytest
+
+from circuit_breaker import CircuitBreaker
+
+
+def test_interrupted_probe_frees_the_half_open_slot():
+    def failing():
+        raise RuntimeError("down")
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    breaker = CircuitBreaker("test", min_calls=1, window=1, open_seconds=0.01)
+    with pytest.raises(RuntimeError):
+        breaker.call(failing)
+    assert breaker.state == "open"
+    time.sleep(0.02)
+
+    with pytest.raises(KeyboardInterrupt):
+        breaker.call(interrupted)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == "closed"
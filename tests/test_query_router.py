@@ -0,0 +1,9 @@
+from query_router import DATA_DEPARTMENTS, extract_entities
+
+
+def test_career_goal_titles_keep_their_departments():
+    # build_career_plan asks for "courses for <career goal>"
+    for query in ("courses for machine learning engineer", "courses for data scientist"):
+        entities = extract_entities(query)
+        assert entities.departments == list(DATA_DEPARTMENTS), query
+        assert len(entities.titles) == 1, query
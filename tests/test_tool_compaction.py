@@ -0,0 +1,20 @@
+from tool_compaction import compact_result
+
+
+def test_links_survive_compaction():
+    def link(i):
+        return f"https://example.com/jobs/{i}?utm_source=google_jobs_apply&utm_campaign=google_jobs_apply"
+
+    result = {
+        "count": 50,
+        "results": [
+            {"title": f"Engineer {i}", "link": link(i), "more_links": [link(i + 100)], "description": f"{i} " * 150}
+            for i in range(50)
+        ]
+    }
+    compacted = compact_result("search_jobs", result, budget=2500, low_value_fields=())
+    rows = compacted["results"]
+    assert rows and "results_omitted" in compacted
+    for i, row in enumerate(rows):
+        assert row["link"] == link(i) and row["more_links"] == [link(i + 100)]
+        assert row["description"].endswith("...")
@@ -0,0 +1,238 @@
+"""
+Tool Compaction
+Fits tool results to a token budget before they are handed to the model.
+Results within budget are returned unchanged. Larger results are compacted
+in stages, least lossy first, stopping as soon as the result fits:
+
+    1. drop empty fields
+    2. collapse repeats: fields with the same value in every row of a list
+       are hoisted into a single "<list>_common" entry, identical rows are merged
+    3. drop low-value fields (alternate links, sources, ...)
+    4. trim long prose strings (descriptions) to the longest length that fits;
+       links are never trimmed, since a cut URL is broken
+    5. drop trailing list items, noting how many were omitted
+
+Token counts are estimated from the compact JSON size. Savings are logged
+per call and accumulated per tool (see compaction_stats).
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DEFAULT_TOKEN_BUDGET = 2000
+CHARS_PER_TOKEN = 4
+MIN_STRING_CHARS = 60  # Strings are never trimmed below this length
+MIN_ROWS_TO_COLLAPSE = 3
+LOW_VALUE_FIELDS = ("more_links", "via", "school", "portfolio_value", "search_location", "relevance")
+URL_PATTERN = re.compile(r"^(?:[a-z][a-z0-9+.-]*://|www\.)\S*$", re.IGNORECASE)
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def estimate_tokens(value) -> int:
+    """Estimate how many tokens a tool result costs in the prompt."""
+    return -(-len(_dumps(value)) // CHARS_PER_TOKEN)
+
+
+def token_budget() -> int:
+    """Return the per-result token budget from TOOL_TOKEN_BUDGET."""
+    return int(os.getenv("TOOL_TOKEN_BUDGET", str(DEFAULT_TOKEN_BUDGET)))
+
+
+def compact_result(
+    tool_name: str,
+    result: Dict,
+    budget: Optional[int] = None,
+    low_value_fields: Sequence[str] = LOW_VALUE_FIELDS
+) -> Dict:
+    """
+    Fit a tool result to a token budget.
+
+    Args:
+        tool_name: Tool the result belongs to, used for stats and logging
+        result: JSON-serializable tool result; never modified
+        budget: Token budget (default: TOOL_TOKEN_BUDGET)
+        low_value_fields: Fields that may be dropped from list rows
+
+    Returns:
+        The result itself if it fits, otherwise a compacted copy
+    """
+    budget = token_budget() if budget is None else budget
+    text = _dumps(result)
+    limit = budget * CHARS_PER_TOKEN
+    before = -(-len(text) // CHARS_PER_TOKEN)
+    if len(text) <= limit:
+        _record(tool_name, before, before)
+        return result
+
+    # Round-trip through JSON for a deep copy that is safe to modify
+    compacted = json.loads(text)
+    stages = (
+        _drop_empty,
+        _collapse_repeats,
+        lambda value: _drop_fields(value, frozenset(low_value_fields)),
+        lambda value: _trim_strings(value, limit),
+        lambda value: _truncate_lists(value, limit),
+    )
+    for stage in stages:
+        stage(compacted)
+        if len(_dumps(compacted)) <= limit:
+            break
+
+    after = estimate_tokens(compacted)
+    _record(tool_name, before, after)
+    logger.info(f"Compacted {tool_name} result from ~{before} to ~{after} tokens (saved ~{before - after})")
+    return compacted
+
+
+def compaction_stats() -> Dict[str, Dict[str, int]]:
+    """Return per-tool call counts and estimated tokens before and after compaction."""
+    with _stats_lock:
+        return {tool: dict(stats) for tool, stats in _stats.items()}
+
+
+def _record(tool_name: str, before: int, after: int):
+    with _stats_lock:
+        stats = _stats.setdefault(tool_name, {"calls": 0, "compacted": 0, "tokens_before": 0, "tokens_after": 0})
+        stats["calls"] += 1
+        stats["compacted"] += before != after
+        stats["tokens_before"] += before
+        stats["tokens_after"] += after
+        stats["tokens_saved"] = stats["tokens_before"] - stats["tokens_after"]
+
+
+def _row_lists(value, parent=None, key=None):
+    """Yield (parent dict, key, list) for every list of dicts, deepest first."""
+    if isinstance(value, dict):
+        for child_key, child in list(value.items()):
+            yield from _row_lists(child, value, child_key)
+    elif isinstance(value, list):
+        for child in value:
+            yield from _row_lists(child)
+        if parent is not None and value and all(isinstance(row, dict) for row in value):
+            yield parent, key, value
+
+
+def _drop_empty(value):
+    if isinstance(value, dict):
+        for key in [key for key, child in value.items() if child in ("", None, [], {})]:
+            del value[key]
+        for child in value.values():
+            _drop_empty(child)
+    elif isinstance(value, list):
+        for child in value:
+            _drop_empty(child)
+
+
+def _collapse_repeats(value):
+    for parent, key, rows in list(_row_lists(value)):
+        # Merge identical rows
+        seen = set()
+        unique = []
+        for row in rows:
+            fingerprint = _dumps(row)
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                unique.append(row)
+        if len(unique) < len(rows):
+            parent[f"{key}_duplicates_merged"] = len(rows) - len(unique)
+            rows[:] = unique
+
+        # Hoist fields that have the same value in every row
+        if len(rows) < MIN_ROWS_TO_COLLAPSE:
+            continue
+        common = {}
+        for field, field_value in rows[0].items():
+            if all(field in row and row[field] == field_value for row in rows[1:]):
+                common[field] = field_value
+        if common:
+            for row in rows:
+                for field in common:
+                    del row[field]
+            parent[f"{key}_common"] = common
+
+
+def _drop_fields(value, fields: frozenset):
+    for _, _, rows in _row_lists(value):
+        for row in rows:
+            for field in fields.intersection(row):
+                del row[field]
+
+
+def _string_slots(value, slots: List[Tuple[object, object]]):
+    """Collect (container, key) of every non-URL string value longer than MIN_STRING_CHARS."""
+    items = value.items() if isinstance(value, dict) else enumerate(value) if isinstance(value, list) else ()
+    for key, child in items:
+        if isinstance(child, str):
+            if len(child) > MIN_STRING_CHARS and not URL_PATTERN.match(child):
+                slots.append((value, key))
+        else:
+            _string_slots(child, slots)
+
+
+def _trim_strings(value, limit: int):
+    slots: List[Tuple[object, object]] = []
+    _string_slots(value, slots)
+    if not slots:
+        return
+
+    excess = len(_dumps(value)) - limit
+    lengths = sorted((len(container[key]) for container, key in slots), reverse=True)
+
+    # Longest cap whose trimming removes at least `excess` characters
+    low, high = MIN_STRING_CHARS, lengths[0]
+    while low < high:
+        cap = (low + high + 1) // 2
+        removed = sum(length - cap - 3 for length in lengths if length > cap + 3)
+        if removed >= excess:
+            low = cap
+        else:
+            high = cap - 1
+    cap = low
+
+    for container, key in slots:
+        text = container[key]
+        if len(text) > cap + 3:
+            container[key] = text[:cap].rstrip() + "..."
+
+
+def _truncate_lists(value, limit: int):
+    lists = []
+
+    def collect(node, parent=None, key=None):
+        if isinstance(node, dict):
+            for child_key, child in list(node.items()):
+                collect(child, node, child_key)
+        elif isinstance(node, list):
+            if parent is not None and len(node) > 1:
+                lists.append((parent, key, node))
+            for child in node:
+                collect(child)
+
+    collect(value)
+    excess = len(_dumps(value)) - limit
+    omitted: Dict[int, int] = {}
+    # Always shrink the currently longest list, so lists are cut evenly
+    while excess > 0:
+        candidates = [entry for entry in lists if len(entry[2]) > 1]
+        if not candidates:
+            break
+        parent, key, items = max(candidates, key=lambda entry: len(entry[2]))
+        excess -= len(_dumps(items.pop())) + 1
+        omitted[id(items)] = omitted.get(id(items), 0) + 1
+
+    for parent, key, items in lists:
+        if id(items) in omitted:
+            parent[f"{key}_omitted"] = omitted[id(items)]